@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Microbenchmarks for the Robot hot paths, run against the simulated bus in virtual_bus.py.
+
+Measures how latency and bus traffic scale with motor count and baud rate, and writes
+machine-readable JSON that can be diffed between commits:
+
+    python benchmark.py --motors 1 2 4 6 --baudrates 57600 1000000 --output bench_new.json
+    python benchmark.py --compare bench_old.json bench_new.json
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+
+from log_conf import logger
+
+from robot import *
+
+def make_virtual_config(num_motors, baudrate, model_type=1230, drivemode=12, virtual_options=None):
+    """Build a robot configuration dictionary for num_motors simulated motors with ids 1..num_motors."""
+    controllers = {
+        "port": "virtual",
+        "virtual": True,
+        "virtual_options": virtual_options or {},
+        "protocol": 2,
+        "baudrate": baudrate,
+        "blocking": False,
+        "verify": "none",
+    }
+    if model_type != 350:
+        controllers["drivemode"] = drivemode
+    motors = {f"motor_{i}": {"id": i, "type": model_type, "angle_limit": [-150.0, 150.0]}
+              for i in range(1, num_motors + 1)}
+    return {"controllers": controllers, "motors": motors}
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def run_case(robot, name, fn, iterations, warmup, after=None):
+    """
+    Time fn() iterations times and count the bus traffic it causes.
+    after(), if given, runs untimed after every call (e.g. to stop a move).
+    Returns a result dictionary with latencies in microseconds.
+    """
+    stats = robot.port_handler.stats
+    for i in range(warmup):
+        fn(i)
+        if after is not None:
+            after()
+
+    samples = []
+    totals = {"tx_packets": 0, "rx_packets": 0, "tx_bytes": 0, "rx_bytes": 0, "bus_time_s": 0.0}
+    for i in range(iterations):
+        before = dict(stats)
+        start = time.perf_counter_ns()
+        fn(i)
+        samples.append((time.perf_counter_ns() - start) / 1000.0)
+        for key in totals:
+            totals[key] += stats[key] - before[key]
+        if after is not None:
+            after()
+
+    samples.sort()
+    return {
+        "case": name,
+        "calls": iterations,
+        "mean_us": sum(samples) / len(samples),
+        "p50_us": percentile(samples, 50),
+        "p90_us": percentile(samples, 90),
+        "p99_us": percentile(samples, 99),
+        "max_us": samples[-1],
+        "packets_per_call": (totals["tx_packets"] + totals["rx_packets"]) / iterations,
+        "tx_packets_per_call": totals["tx_packets"] / iterations,
+        "tx_bytes_per_call": totals["tx_bytes"] / iterations,
+        "rx_bytes_per_call": totals["rx_bytes"] / iterations,
+        "bus_time_us_per_call": totals["bus_time_s"] * 1e6 / iterations,
+    }
+
+def benchmark_robot(num_motors, baudrate, iterations, warmup, model_type, virtual_options):
+    """Run every hot path case on one simulated robot. Returns a list of result dictionaries."""
+    robot = Robot(make_virtual_config(num_motors, baudrate, model_type=model_type, virtual_options=virtual_options))
+    robot.enable_torque()
+
+    ids = robot.get_motor_ids()
+    poses = [{dxl_id: 20.0 for dxl_id in ids}, {dxl_id: -20.0 for dxl_id in ids}]
+    durations = {dxl_id: 100 for dxl_id in ids}
+    velocities = {dxl_id: 100 for dxl_id in ids}
+
+    def stop_move():
+        # stop the non-blocking move so the next call starts from rest, outside the timed region
+        if robot.last_move is not None and not robot.last_move.done():
+            robot.last_move.cancel()
+
+    cases = [
+        ("move_motors", lambda i: robot.move_motors(poses[i % 2]), None),
+        ("move_motors_sync[plain]", lambda i: robot.move_motors_sync(poses[i % 2]), stop_move),
+        ("move_motors_sync[duration]", lambda i: robot.move_motors_sync(poses[i % 2], duration=durations), stop_move),
+        ("move_motors_sync[velocity]", lambda i: robot.move_motors_sync(poses[i % 2], velocity=velocities), stop_move),
+        ("get_positions", lambda i: robot.get_positions(), None),
+        ("check_motor_status", lambda i: robot.check_motor_status(["all"]), None),
+        ("check_move_complete", lambda i: robot.check_move_complete(poll_interval=0), None),
+        ("_prepare_targets", lambda i: robot._prepare_targets(poses[i % 2], degrees=True, check_range=True), None),
+        ("degree_to_dxl", lambda i: degree_to_dxl(poses[i % 2][ids[0]], robot.model_type), None),
+    ]
+
+    results = []
+    for name, fn, after in cases:
+        result = run_case(robot, name, fn, iterations, warmup, after=after)
+        result.update({"motors": num_motors, "baudrate": baudrate, "model_type": model_type})
+        results.append(result)
+
+    robot.clean_shutdown()
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def compare(old_path, new_path):
+    """Print the p50 and packets per call change of every case present in both result files."""
+    with open(old_path) as f:
+        old = {(r["case"], r["motors"], r["baudrate"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = {(r["case"], r["motors"], r["baudrate"]): r for r in json.load(f)["results"]}
+
+    print("%-28s %6s %8s %12s %12s %8s %10s" % ("case", "motors", "baud", "old p50 us", "new p50 us", "change", "pkts/call"))
+    for key in sorted(set(old) & set(new)):
+        o, n = old[key], new[key]
+        change = (n["p50_us"] - o["p50_us"]) / o["p50_us"] * 100.0 if o["p50_us"] else 0.0
+        print("%-28s %6d %8d %12.1f %12.1f %+7.1f%% %4.1f->%-4.1f" % (key[0], key[1], key[2], o["p50_us"], n["p50_us"],
+                                                                 change, o["packets_per_call"], n["packets_per_call"]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Robot hot paths on the simulated bus.")
+    parser.add_argument("--motors", type=int, nargs="+", default=[1, 2, 4, 6])
+    parser.add_argument("--baudrates", type=int, nargs="+", default=[57600, 1000000])
+    parser.add_argument("--model", type=int, default=1230, help="motor type: 350, 1200 or 1230")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--usb-latency-ms", type=float, default=1.0)
+    parser.add_argument("--return-delay", type=int, default=None, help="Return Delay Time register value (2 us units)")
+    parser.add_argument("--output", default=None, help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # keep per-call logging out of the measurements
+    logger.setLevel(logging.WARNING)
+
+    virtual_options = {"usb_latency_ms": args.usb_latency_ms, "return_delay": args.return_delay}
+    results = []
+    for baudrate in args.baudrates:
+        for num_motors in args.motors:
+            print(f"Benchmarking {num_motors} motors at {baudrate} baud...", file=sys.stderr)
+            results.extend(benchmark_robot(num_motors, baudrate, args.iterations, args.warmup, args.model, virtual_options))
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "iterations": args.iterations,
+            "usb_latency_ms": args.usb_latency_ms,
+            "return_delay": args.return_delay,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import queue
+import itertools
+import functools
+import threading
+
+from log_conf import logger
+
+# Transaction priorities, lowest value runs first
+PRIORITY_EMERGENCY = 0      # emergency torque off
+PRIORITY_WRITE = 1          # goal and configuration writes
+PRIORITY_READ = 2           # status reads
+PRIORITY_TELEMETRY = 3      # background telemetry sampling, yields to everything else
+
+class BusTransaction:
+    """A unit of work queued for the bus owner thread, with a result that can be waited on."""
+    def __init__(self, priority, seq, fn, args, kwargs):
+        self.priority = priority
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.exception = None
+        self._event = threading.Event()
+
+    def __lt__(self, other):
+        # equal priorities run in submission order
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def done(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Wait for the transaction to run. Returns its result, or raises the exception it raised."""
+        if not self._event.wait(timeout):
+            raise TimeoutError("Bus transaction did not run in time")
+        if self.exception is not None:
+            raise self.exception
+        return self.result
+
+    def _run(self):
+        try:
+            self.result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.exception("Bus transaction %s failed", getattr(self.fn, "__name__", self.fn))
+            self.exception = e
+        finally:
+            self._event.set()
+
+class BusExecutor:
+    """
+    Owns a serial port from one dedicated thread.
+    Transactions submitted from any thread are run one at a time, highest priority first,
+    so several producers can share a robot without interleaving packets on the bus.
+    """
+    def __init__(self, name="bus-executor"):
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._running = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        logger.info("Bus executor started")
+
+    def stop(self):
+        """Run the transactions already queued, then stop the bus thread."""
+        if not self._running:
+            return
+        self._running = False
+        # sentinel sorts after every real transaction
+        self._queue.put(BusTransaction(float("inf"), next(self._seq), None, (), {}))
+        if not self.in_executor_thread():
+            self._thread.join()
+        logger.info("Bus executor stopped")
+
+    def is_running(self):
+        return self._running
+
+    def in_executor_thread(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, priority, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) on the bus thread and return its BusTransaction."""
+        if not self._running:
+            raise RuntimeError("Bus executor is not running")
+        transaction = BusTransaction(priority, next(self._seq), fn, args, kwargs)
+        self._queue.put(transaction)
+        return transaction
+
+    def run(self, priority, fn, *args, **kwargs):
+        """Run fn on the bus thread and wait for its result. Runs inline when called from the bus thread."""
+        if self.in_executor_thread():
+            return fn(*args, **kwargs)
+        return self.submit(priority, fn, *args, **kwargs).wait()
+
+    def _run(self):
+        while 1:
+            transaction = self._queue.get()
+            if transaction.fn is None:
+                return
+            transaction._run()
+
+def bus_transaction(priority):
+    """
+    Decorator for Robot methods that talk to the bus.
+    With a running bus executor the method runs on the bus thread at the given priority,
+    otherwise it runs in the caller's thread under the robot's bus lock.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            executor = self._bus_executor
+            if executor is not None and executor.is_running() and not executor.in_executor_thread():
+                return executor.run(priority, method, self, *args, **kwargs)
+            with self._bus_lock:
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -26,6 +26,9 @@ def motor_control_thread():
         
         if command["type"] == "status":
             my_robot.check_motor_status(command["args"])
+
+        elif command["type"] == "last_status":
+            my_robot.check_motor_status(["all"], cached=True)
         
         elif command["type"] == "diagnostic":
             my_robot.get_diagnostic(command["args"])
@@ -41,7 +44,8 @@ def motor_control_thread():
 
         elif command["type"] == "play_seq":
             # TODO: untested 
-            my_sequence = Sequence(file_name=command["args"], robot_config=ROBOT_330)
+            # replaying an animation reuses the already loaded sequence
+            my_sequence = load_sequence(command["args"], ROBOT_330)
             my_sequence.play_sequence(robot=my_robot)
 
 def cli_interface_thread():
@@ -52,6 +56,7 @@ def cli_interface_thread():
         if parts[0] == "help":
             print("Command Options:")
             print("Status: status all, status <motor ids and/or names>")
+            print("Last known status (no bus traffic): last_status")
             print("Diagnostic: diagnostic all, status <motor ids and/or names>")
             print("Move (blocking): move <motor id or name>:<position in degrees or DXL increments> ...")
             print("Move (non-blocking): sync_move <motor id or name>:<position in degrees or DXL increments> ...")
@@ -69,6 +74,9 @@ def cli_interface_thread():
             
             command_queue.put({"type": "status", "args": args})
         
+        elif parts[0] == "last_status":
+            command_queue.put({"type": "last_status", "args": None})
+
         elif parts[0] == "diagnostic":
             args = []
             for elem in parts[1:]:
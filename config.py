@@ -228,3 +228,47 @@ ROBOT_320_RPI = {
         }
     }
 }
+
+ROBOT_330_VIRTUAL = {
+    "controllers": {
+        "port": "virtual",         # simulated bus, no hardware needed (see virtual_bus.py)
+        "virtual": True,
+        "protocol": 2,
+        "baudrate": 1000000,
+        "drivemode": 12,         # time-based profile and torque on by goal update 
+        "blocking": True,
+    },
+    "motors": {
+        "base": {
+            "id": 4,
+            "type": 1230,       # code for XC-330
+            "angle_limit": [-150.0, 150.0],
+        },
+        "tower_1": {
+            "id": 1,
+            "type": 1230,
+            "angle_limit": [-150.0, 150.0],
+        },
+        "tower_2": {
+            "id": 2,
+            "type": 1230,
+            "angle_limit": [-150.0, 150.0],
+        },
+        "tower_3": {
+            "id": 3,
+            "type": 1230,
+            "angle_limit": [-150.0, 150.0],
+        },
+        "shoulder": {
+            "id": 5,
+            "type": 1230,
+            "angle_limit": [-150.0, 150.0],
+        },
+        "arm": {
+            "id": 6,
+            "type": 1230,
+            "angle_limit": [-150.0, 150.0],
+        },
+        
+    }
+}
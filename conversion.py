@@ -1,23 +1,88 @@
 # Modified from pypot's conversion.py file
 # Source: https://github.com/poppy-project/pypot/blob/master/pypot/dynamixel/conversion.py
 
+import numpy as np
+
 # Motor type : (Max pos, max degree)
 position_range = {
     350: (1024, 300.0),
+    1200: (4096, 360.0),
     1230: (4096, 360.0)
 }
 
+# Lookup tables, built on first use per motor type:
+# degree -> DXL for every 0.1 degree step from -max_deg/2 to max_deg/2 (with the grid angles), and DXL -> degree for every position
+_degree_luts = {}
+_dxl_luts = {}
+
 def dxl_to_degree(value, model):
     max_pos, max_deg = position_range[model]
-    
+
 
     return round(((max_deg * float(value)) / (max_pos - 1)) - (max_deg / 2), 1)
 
-def degree_to_dxl(value, model): 
+def _degree_to_dxl(value, model):
     max_pos, max_deg = position_range[model]
-    
+
 
     pos = int(round((max_pos - 1) * ((max_deg / 2 + float(value)) / max_deg), 0))
     pos = min(max(pos, 0), max_pos - 1)
-    print(model,value,pos)    
-    return pos
\ No newline at end of file
+    return pos
+
+def degree_lut(model):
+    """
+    Returns (angles, positions): every angle on the 0.1 degree grid, from -max_deg/2 to max_deg/2,
+    and the DXL position of each. Index i is the angle round(i / 10 - max_deg / 2, 1).
+    """
+    lut = _degree_luts.get(model)
+    if lut is None:
+        half = position_range[model][1] / 2
+        angles = [round(i / 10.0 - half, 1) for i in range(int(round(20 * half)) + 1)]
+        lut = (angles, [_degree_to_dxl(angle, model) for angle in angles])
+        _degree_luts[model] = lut
+    return lut
+
+def dxl_lut(model):
+    """Table of angles in degrees for every DXL position."""
+    lut = _dxl_luts.get(model)
+    if lut is None:
+        lut = [dxl_to_degree(pos, model) for pos in range(position_range[model][0])]
+        _dxl_luts[model] = lut
+    return lut
+
+def degree_to_dxl(value, model):
+    """Convert an angle in degrees to a DXL position. Angles on the 0.1 degree grid come from the lookup table."""
+    value = float(value)
+    angles, positions = degree_lut(model)
+    i = int(round((value + position_range[model][1] / 2) * 10))
+    if 0 <= i < len(angles) and angles[i] == value:
+        return positions[i]
+    return _degree_to_dxl(value, model)
+
+def degrees_to_dxl(values, model):
+    '''
+    Convert many angles at once.
+    A dict of angles returns a dict with the same keys. Anything else is treated as an array
+    (a list, a list of frames, a NumPy array) and returns a NumPy integer array of the same shape.
+    Gives the same positions as degree_to_dxl.
+    '''
+    if isinstance(values, dict):
+        return {key: degree_to_dxl(value, model) for key, value in values.items()}
+
+    max_pos, max_deg = position_range[model]
+    values = np.asarray(values, dtype=float)
+    pos = np.rint((max_pos - 1) * ((max_deg / 2 + values) / max_deg))
+    return np.clip(pos, 0, max_pos - 1).astype(np.int64)
+
+def dxls_to_degree(values, model):
+    '''
+    Convert many DXL positions to degrees at once, through the lookup table.
+    A dict returns a dict with the same keys, anything else returns a NumPy float array of the same shape.
+    Positions outside 0 to max position - 1 are clipped to that range, like degrees_to_dxl.
+    '''
+    lut = dxl_lut(model)
+    last = len(lut) - 1
+    if isinstance(values, dict):
+        return {key: lut[min(max(int(value), 0), last)] for key, value in values.items()}
+
+    return np.asarray(lut)[np.clip(np.asarray(values, dtype=np.int64), 0, last)]
@@ -1,54 +1,114 @@
-import time
 import numpy as np
+from log_conf import logger
 from robot import Robot
 from config import ROBOT_330_LAB
+from frame_clock import FrameClock
+from interpolation import interpolate, max_frame_rate
 
-def record_demonstration(duration=10, interval=0.01, save_path='demonstration.npy'):
+# Joints of plain (N, 1 + joints) recordings, which do not name their columns
+DEFAULT_JOINTS = [5, 6]
+
+# Extra time allowed for the lead-in move to the first frame, in seconds
+LEAD_IN_MARGIN_S = 1.0
+
+def record_demonstration(duration=10, interval=0.01, save_path='demonstration.npy', motors=(5, 6)):
     robot = Robot(config_dict=ROBOT_330_LAB)
     #robot.enable_torque()
     
-    data = []
-    start_time = time.time()
     print("Recording demonstration... Move the robot manually.")
-    
-    while time.time() - start_time < duration:
-        angles = robot.get_motor_angles([5, 6])  # Only motor 1 and 2
-        timestamp = time.time() - start_time
-        data.append([timestamp] + angles)
-        time.sleep(interval)
-    
-    np.save(save_path, np.array(data))
-    print(f"Saved demonstration to {save_path}")
+    # only one chunk of samples is held in memory, the rest go straight to save_path
+    data, stats = robot.record(list(motors), duration=duration, rate_hz=1.0 / interval, spill_path=save_path)
+
+    # structured array: "time" in seconds, then one field of angles per motor name
+    logger.info("Saved demonstration to %s: %d samples at %.1f Hz, %d missed",
+                save_path, stats["samples"], stats["achieved_hz"], stats["missed"])
     robot.clean_shutdown()
 
-def replay_demonstration(load_path='demonstration.npy'):
-    robot = Robot(config_dict=ROBOT_330_LAB)
-    robot.enable_torque()
-    robot.set_speed(30,300)
+def load_demonstration(load_path, joints=None):
+    '''
+    Load a recorded demonstration. Returns (times in seconds, positions array of samples x joints, joints).
+    Joints come from the file: the motor fields of a structured recording, or for a plain
+    (N, 1 + joints) array the joints argument, defaulting to DEFAULT_JOINTS.
+    '''
+    data = np.load(load_path, mmap_mode="r")
+    if data.dtype.names:
+        names = [name for name in data.dtype.names if name != "time"]
+        times = np.asarray(data["time"], dtype=float)
+        positions = np.column_stack([np.asarray(data[name], dtype=float) for name in names])
+        joints = list(joints) if joints is not None else names
+    else:
+        times = np.asarray(data[:, 0], dtype=float)
+        positions = np.asarray(data[:, 1:], dtype=float)
+        joints = list(joints) if joints is not None else list(DEFAULT_JOINTS)
+    if len(joints) != positions.shape[1]:
+        raise ValueError(f"{load_path} has {positions.shape[1]} joints, got names for {len(joints)}")
+    return times, positions, joints
+
+class DemonstrationReplay:
+    '''
+    Replays a recorded demonstration at a fixed control rate.
+
+    The recording is resampled once for all joints at rate_hz (capped to what the bus can carry),
+    each frame being a move that lasts one period, even when that is shorter than MIN_MOVE_DURATION_MS,
+    and every resampled frame is compiled to its sync write packets up front. play() then only
+    paces the packets out with a FrameClock, so replay costs little CPU and every run sends
+    the same commands at the same times.
+    '''
+    def __init__(self, robot, load_path, rate_hz=20.0, joints=None, method="linear"):
+        self.robot = robot
+        times, positions, self.joints = load_demonstration(load_path, joints)
 
-    data = np.load(load_path)  # shape: (N, 3) -> [time, angle1, angle2]
-    timestamps = data[:, 0]
-    angles1 = data[:, 1]
-    angles2 = data[:, 2]
+        cap = max_frame_rate(robot, len(self.joints))
+        if rate_hz > cap:
+            logger.warning("Capping replay rate from %.1f Hz to %.1f Hz for %d joints at %d baud",
+                           rate_hz, cap, len(self.joints), robot.baud_rate)
+            rate_hz = cap
+        self.rate_hz = rate_hz
+        period_s = 1.0 / rate_hz
 
-    start_time = time.time()
-    print("Replaying demonstration with interpolation...")
+        # always finish on the last recorded sample
+        self.sample_times = np.append(np.arange(times[0], times[-1], period_s), times[-1])
+        self.table = interpolate(times, positions, self.sample_times, method)
+        durations = np.full(self.table.shape, 1000.0 * period_s)
+        self.moves = robot.compile_moves(self.joints, self.table, durations, start_positions=self.table[0],
+                                         min_duration_ms=1000.0 * period_s)
+        if self.moves is None:
+            raise ValueError(f"Invalid joints {self.joints} for this robot")
 
-    while True:
-        now = time.time() - start_time
-        if now > timestamps[-1]:
-            break
+    def play(self, clock=None, lead_in_ms=1000):
+        '''
+        Move to the first frame over lead_in_ms, then stream the frames on schedule.
+        Returns the clock, whose stats() describe how late the frames were, or None if the
+        lead-in move could not be sent.
+        '''
+        start = dict(zip(self.joints, self.table[0].tolist()))
+        timeout_s = lead_in_ms / 1000.0 + LEAD_IN_MARGIN_S
+        lead_in = self.robot.move_motors_sync_async(start, duration={joint: lead_in_ms for joint in self.joints}, timeout=timeout_s)
+        if lead_in is None:
+            logger.error("Could not send the lead-in move to the first frame, not replaying")
+            return None
+        if not lead_in.wait(timeout_s) or lead_in.status != "complete":
+            logger.warning("Joints %s did not reach the first frame within %.1f s, replaying anyway", self.joints, timeout_s)
 
-        # Linear interpolation
-        angle1 = np.interp(now, timestamps, angles1)
-        angle2 = np.interp(now, timestamps, angles2)
+        if clock is None:
+            clock = FrameClock(spin_ms=0.5)
+        clock.start()
+        for i, move in enumerate(self.moves):
+            if clock.wait_for(i, 1000.0 * (self.sample_times[i] - self.sample_times[0])):
+                self.robot.send_compiled(move)
+        return clock
+
+def replay_demonstration(load_path='demonstration.npy', rate_hz=20.0, joints=None):
+    robot = Robot(config_dict=ROBOT_330_LAB)
+    robot.enable_torque()
 
-        # Move motors without duration (or set short constant)
-        robot.move_motors_sync(args={5: angle1, 6: angle2}, duration={5:30, 6:30})
-        #time.sleep(0.01)  # ~20 Hz refresh
+    replay = DemonstrationReplay(robot, load_path, rate_hz=rate_hz, joints=joints)
+    logger.info("Replaying %d frames of %s at %.1f Hz", len(replay.moves), replay.joints, replay.rate_hz)
+    clock = replay.play()
 
     robot.clean_shutdown()
-    print("Replay complete.")
+    if clock is not None:
+        logger.info("Replay complete: %s", clock.stats())
 
 if __name__ == "__main__":
     # Choose one at a time
@@ -0,0 +1,86 @@
+import time
+
+from log_conf import logger
+
+# What to do with a frame whose start time has already passed:
+# "catch_up" sends it immediately and keeps the original schedule for later frames,
+# "drop" skips it if it is later than drop_threshold_ms,
+# "stretch" sends it immediately and shifts every later frame by the lateness
+FRAME_POLICIES = ("catch_up", "drop", "stretch")
+
+# Frames dispatched later than this count as late in stats() and are logged
+LATE_FRAME_MS = 1.0
+
+class FrameClock:
+    """
+    Schedules frames against a start time with sub-millisecond precision.
+    Waits with a coarse time.sleep until spin_ms before the deadline, then busy-waits on
+    time.perf_counter_ns. Records how late every frame was dispatched.
+    """
+    def __init__(self, policy="catch_up", spin_ms=2.0, drop_threshold_ms=5.0):
+        if policy not in FRAME_POLICIES:
+            msg = f"Unknown frame clock policy: {policy}"
+            logger.critical(msg)
+            raise RuntimeError(msg)
+        self.policy = policy
+        self.spin_ns = int(spin_ms * 1000000)
+        self.drop_threshold_ns = int(drop_threshold_ms * 1000000)
+        self.start()
+
+    def start(self):
+        """Set time zero to now and clear the statistics."""
+        self._start_ns = time.perf_counter_ns()
+        self._offset_ns = 0
+        self.lateness_ms = []
+        self.dropped = []
+
+    def elapsed_ms(self):
+        """Milliseconds since start, not counting time added by the stretch policy."""
+        return (time.perf_counter_ns() - self._start_ns - self._offset_ns) / 1000000.0
+
+    def wait_for(self, frame, frame_ms, droppable=True):
+        '''
+        Wait until frame_ms after start, then return True if the frame should be sent.
+        Returns False only with the drop policy, for a droppable frame that is already too late.
+        '''
+        target_ns = self._start_ns + self._offset_ns + int(frame_ms * 1000000)
+        now = time.perf_counter_ns()
+        late_ns = now - target_ns
+
+        if late_ns > 0:
+            if self.policy == "drop" and droppable and late_ns > self.drop_threshold_ns:
+                logger.warning("Frame %d is late by %2.4f ms; dropping it", frame, late_ns / 1000000.0)
+                self.dropped.append(frame)
+                return False
+            if self.policy == "stretch":
+                # push the rest of the schedule back by the lateness
+                self._offset_ns += late_ns
+            if late_ns > LATE_FRAME_MS * 1000000:
+                logger.warning("Frame %d is late by %2.4f ms", frame, late_ns / 1000000.0)
+            self.lateness_ms.append(late_ns / 1000000.0)
+            return True
+
+        # coarse sleep, then spin for the last stretch
+        sleep_ns = target_ns - now - self.spin_ns
+        if sleep_ns > 0:
+            time.sleep(sleep_ns / 1000000000.0)
+        while time.perf_counter_ns() < target_ns:
+            pass
+
+        self.lateness_ms.append((time.perf_counter_ns() - target_ns) / 1000000.0)
+        return True
+
+    def stats(self):
+        """Summary of the frames waited for: count, dropped, late (over LATE_FRAME_MS), mean/max/p99 lateness in ms and total stretch."""
+        lateness = sorted(self.lateness_ms)
+        count = len(lateness)
+        return {
+            "policy": self.policy,
+            "frames": count,
+            "dropped": len(self.dropped),
+            "late_frames": sum(1 for late in lateness if late > LATE_FRAME_MS),
+            "mean_ms": sum(lateness) / count if count else 0.0,
+            "max_ms": lateness[-1] if count else 0.0,
+            "p99_ms": lateness[min(count - 1, int(count * 0.99))] if count else 0.0,
+            "stretch_ms": self._offset_ns / 1000000.0,
+        }
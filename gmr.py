@@ -0,0 +1,58 @@
+import numpy as np
+
+class GMR:
+    '''
+    Gaussian Mixture Regression on a fitted Gaussian mixture.
+
+    Conditions the mixture on the in_idx dimensions (for example time) to predict the out_idx
+    dimensions (for example joint angles). Everything that depends only on the model is computed
+    once here: the inverse and log-determinant of each component's input covariance, and its
+    regression matrix and offset. predict() then evaluates every query against every component
+    in a few batched array operations, with responsibilities normalized in the log domain
+    (log-sum-exp) so queries far from every component do not underflow to zero.
+    '''
+    def __init__(self, means, covariances, weights, in_idx=(0,), out_idx=(1, 2)):
+        self.in_idx = list(in_idx)
+        self.out_idx = list(out_idx)
+        means = np.asarray(means, dtype=float)
+        covariances = np.asarray(covariances, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+
+        self.mu_in = means[:, self.in_idx]                                      # (K, D)
+        mu_out = means[:, self.out_idx]                                          # (K, O)
+        sigma_in = covariances[:, self.in_idx][:, :, self.in_idx]                # (K, D, D)
+        sigma_cross = covariances[:, self.out_idx][:, :, self.in_idx]            # (K, O, D)
+
+        self.sigma_in_inv = np.linalg.pinv(sigma_in)                             # (K, D, D)
+        _, logdet = np.linalg.slogdet(sigma_in)
+        # log of weight / sqrt((2 pi)^D det), the constant part of each component's log density
+        self.log_norm = np.log(weights) - 0.5 * (len(self.in_idx) * np.log(2 * np.pi) + logdet)   # (K,)
+        # conditional mean of component k: mu_out + A_k (x - mu_in) = A_k x + b_k
+        self.A = sigma_cross @ self.sigma_in_inv                                  # (K, O, D)
+        self.b = mu_out - np.einsum("kod,kd->ko", self.A, self.mu_in)             # (K, O)
+
+    @classmethod
+    def from_gmm(cls, gmm, in_idx=(0,), out_idx=(1, 2)):
+        """Build from a fitted sklearn GaussianMixture with full covariances."""
+        return cls(gmm.means_, gmm.covariances_, gmm.weights_, in_idx, out_idx)
+
+    def responsibilities(self, x_query):
+        """Posterior probability of each component for each query, as an (N, K) array."""
+        x = np.asarray(x_query, dtype=float).reshape(-1, len(self.in_idx))
+        diff = x[:, None, :] - self.mu_in[None, :, :]                                   # (N, K, D)
+        mahalanobis = np.einsum("nkd,kde,nke->nk", diff, self.sigma_in_inv, diff)
+        log_p = self.log_norm - 0.5 * mahalanobis
+        log_p -= log_p.max(axis=1, keepdims=True)
+        p = np.exp(log_p)
+        return p / p.sum(axis=1, keepdims=True)
+
+    def predict(self, x_query):
+        """Expected outputs for each query, as an (N, O) array. x_query is (N, D), or (N,) for a single input dimension."""
+        x = np.asarray(x_query, dtype=float).reshape(-1, len(self.in_idx))
+        h = self.responsibilities(x)                                                    # (N, K)
+        # mean of every component for every query, weighted by the responsibilities
+        return np.einsum("nk,nko->no", h, np.einsum("kod,nd->nko", self.A, x) + self.b)
+
+def gmr(gmm, x_query, in_idx=(0,), out_idx=(1, 2)):
+    """Predict the out_idx dimensions of x_query with a fitted GaussianMixture. Builds a GMR each call; keep a GMR to query repeatedly."""
+    return GMR.from_gmm(gmm, in_idx, out_idx).predict(x_query)
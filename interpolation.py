@@ -0,0 +1,132 @@
+import numpy as np
+
+from log_conf import logger
+
+from sequence import Sequence
+
+INTERPOLATION_METHODS = ("linear", "cubic", "min_jerk")
+
+# Share of the bus a resampled stream may use, leaving room for status reads
+DEFAULT_BUS_UTILIZATION = 0.5
+
+def interpolate(times, positions, sample_times, method="linear"):
+    '''
+    Interpolate keyframes at sample_times, for every motor at once.
+
+    times is an array of N increasing keyframe times, positions an (N, motors) array, sample_times an array of S times.
+    method is "linear", "cubic" (cubic Hermite with finite difference tangents, passing through every keyframe)
+    or "min_jerk" (each segment follows a minimum jerk profile, starting and stopping at rest on every keyframe).
+    Keyframes sharing a time (a move overtaken by the next one) collapse onto the last of them.
+    Returns an (S, motors) array.
+    '''
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation method: {method}")
+    times = np.asarray(times, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+    sample_times = np.asarray(sample_times, dtype=float)
+    keep = np.append(np.diff(times) > 0, True)
+    times = times[keep]
+    positions = positions[keep]
+    if len(times) == 1:
+        return np.repeat(positions, len(sample_times), axis=0)
+
+    # segment k runs from keyframe k to keyframe k + 1
+    k = np.clip(np.searchsorted(times, sample_times, side="right") - 1, 0, len(times) - 2)
+    span = times[k + 1] - times[k]
+    u = np.divide(sample_times - times[k], span, out=np.ones_like(span), where=span > 0)
+    u = np.clip(u, 0.0, 1.0)[:, None]
+    start = positions[k]
+    end = positions[k + 1]
+
+    if method == "linear":
+        return start + u * (end - start)
+
+    if method == "min_jerk":
+        s = u ** 3 * (10.0 - 15.0 * u + 6.0 * u ** 2)
+        return start + s * (end - start)
+
+    # cubic Hermite, tangents in position per ms
+    tangents = np.gradient(positions, times, axis=0)
+    h = span[:, None]
+    u2 = u * u
+    u3 = u2 * u
+    return ((2 * u3 - 3 * u2 + 1) * start + (u3 - 2 * u2 + u) * h * tangents[k]
+            + (-2 * u3 + 3 * u2) * end + (u3 - u2) * h * tangents[k + 1])
+
+def max_frame_rate(robot, num_motors, bus_utilization=DEFAULT_BUS_UTILIZATION):
+    """Highest rate, in frames per second, at which robot's bus can carry sync writes for num_motors motors."""
+    bits_per_frame = 10 * robot.sync_frame_bytes(num_motors)   # 8 data bits, start and stop bit
+    return bus_utilization * robot.baud_rate / bits_per_frame
+
+class ResampledSequence(Sequence):
+    '''
+    A Sequence resampled to a fixed control rate.
+
+    A keyframe sent at millis with a given duration is reached at millis + duration, so each motor's
+    keyframes are placed at those arrival times (kept in order) and interpolated at rate_hz, capped
+    to what the bus can carry at the robot's baud rate (see max_frame_rate).
+    The first frame keeps its authored durations. Once every motor has reached it, a frame is sent
+    every period, moving to where the curve is one period later over exactly one period. These frames
+    are compiled with a duration floor of one period instead of MIN_MOVE_DURATION_MS, so they are
+    not stretched at rates above 20 Hz.
+    The frames are compiled for robot, and play_sequence(robot) streams them fire-and-forget through
+    send_compiled, paced only by the frame clock, whatever the robot's blocking setting.
+    '''
+    def __init__(self, sequence, robot, rate_hz=20.0, method="min_jerk", bus_utilization=DEFAULT_BUS_UTILIZATION):
+        self.source = sequence
+        self.name = sequence.name
+        self.seq_dict = sequence.seq_dict
+        self.binary = None
+        self.motors_used = list(sequence.motors_used)
+        self.method = method
+
+        cap = max_frame_rate(robot, len(self.motors_used), bus_utilization)
+        if rate_hz > cap:
+            logger.warning("Capping resample rate of %s from %.1f Hz to %.1f Hz for %d motors at %d baud",
+                           self.name, rate_hz, cap, len(self.motors_used), robot.baud_rate)
+            rate_hz = cap
+        self.rate_hz = rate_hz
+        period_ms = 1000.0 / rate_hz
+        self.min_move_duration_ms = period_ms
+
+        num_motors = len(self.motors_used)
+        times = np.asarray(sequence.frame_times[:], dtype=float)
+        positions = np.asarray(sequence.frame_positions[:], dtype=float).reshape(len(times), num_motors)
+        durations = np.asarray(sequence.frame_durations[:], dtype=float).reshape(len(times), num_motors)
+        # when each motor reaches each keyframe; a keyframe cannot be reached before the previous one
+        arrivals = np.maximum.accumulate(times[:, None] + durations, axis=0)
+
+        # stream from when the first move is over until the last keyframe is reached,
+        # each frame targeting the curve one period after it is sent
+        start = arrivals[0].max()
+        end = arrivals[-1].max()
+        send_times = np.arange(start, end - period_ms, period_ms)
+        if end > start:
+            send_times = np.append(send_times, max(end - period_ms, start))
+        target_times = np.minimum(send_times + period_ms, end)
+
+        if (arrivals == arrivals[:, :1]).all():
+            targets = interpolate(arrivals[:, 0], positions, target_times, method)
+        else:
+            targets = np.column_stack([interpolate(arrivals[:, m], positions[:, m:m + 1], target_times, method)[:, 0]
+                                       for m in range(num_motors)]).reshape(len(target_times), num_motors)
+        if not np.isfinite(targets).all():
+            raise ValueError(f"Resampling {self.name} ({method}) gave non-finite positions")
+
+        self.frame_times = [float(times[0])] + send_times.tolist()
+        self.frame_positions = [positions[0].tolist()] + targets.tolist()
+        self.frame_durations = [durations[0].tolist()] + [[float(step)] * num_motors for step in target_times - send_times]
+        self.num_frames = len(self.frame_times)
+
+        self.compiled_frames = None
+        self.compiled_robot = None
+        self.lateness_ms = []
+        self.timing_stats = None
+
+        logger.info("Resampled %s from %d keyframes to %d frames at %.1f Hz (%s)",
+                    self.name, len(times), self.num_frames, rate_hz, method)
+        self.compile(robot)
+
+    def play_sequence(self, robot=None, clock=None, blocking=False):
+        """Play the resampled frames. Does not block on each frame by default, since every frame only lasts one period."""
+        return super().play_sequence(robot=robot, clock=clock, blocking=blocking)
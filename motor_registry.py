@@ -0,0 +1,146 @@
+import numpy as np
+
+from log_conf import logger
+
+# Highest Dynamixel id (253 and up are reserved / broadcast)
+MAX_DXL_ID = 252
+
+# Goal and position value for a motor that has not been commanded or read yet
+UNKNOWN = -1
+
+class MotorRecord:
+    """Static description of one motor: its slot in the registry arrays, id, name and model type."""
+    __slots__ = ("index", "dxl_id", "name", "model_type")
+
+    def __init__(self, index, dxl_id, name, model_type):
+        self.index = index
+        self.dxl_id = dxl_id
+        self.name = name
+        self.model_type = model_type
+
+    def __repr__(self):
+        return f"MotorRecord(index={self.index}, dxl_id={self.dxl_id}, name={self.name!r}, model_type={self.model_type})"
+
+class IndexedTargets:
+    '''
+    Move targets already resolved to registry slots, to skip key resolution on every call.
+    indices are slots from MotorRegistry.resolve, values the targets in the same order
+    (degrees or DXL units, as told to the move function).
+    '''
+    __slots__ = ("indices", "values")
+
+    def __init__(self, indices, values):
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.values = np.asarray(values)
+        if self.indices.shape != self.values.shape:
+            raise ValueError("IndexedTargets needs one value per index")
+
+    def __len__(self):
+        return len(self.indices)
+
+class MotorRegistry:
+    '''
+    Motor metadata and state for a Robot, one slot per motor in config order.
+
+    Motor ids and names map to slots through a dense id table and a name dictionary.
+    Limits, last commanded goals, last read positions and last read velocities are kept
+    in contiguous NumPy arrays indexed by slot, in DXL units.
+    '''
+    def __init__(self, config_motors):
+        self.records = []
+        self.name_to_index = {}
+        # Python list for fast scalar lookups, NumPy copy for resolving arrays of ids
+        self._id_to_index = [-1] * (MAX_DXL_ID + 1)
+        for alias, motor in config_motors.items():
+            dxl_id = motor["id"]
+            if not 0 <= dxl_id <= MAX_DXL_ID:
+                msg = f"Motor id {dxl_id} for {alias} is outside 0-{MAX_DXL_ID}"
+                logger.critical(msg)
+                raise RuntimeError(msg)
+            record = MotorRecord(len(self.records), dxl_id, alias, motor["type"])
+            self.records.append(record)
+            self.name_to_index[alias] = record.index
+            self._id_to_index[dxl_id] = record.index
+        self.id_to_index = np.array(self._id_to_index, dtype=np.intp)
+
+        count = len(self.records)
+        self.ids = np.array([record.dxl_id for record in self.records], dtype=np.int64)
+        self.lower = np.zeros(count, dtype=np.int64)
+        self.upper = np.zeros(count, dtype=np.int64)
+        self.goal = np.full(count, UNKNOWN, dtype=np.int64)
+        self.position = np.full(count, UNKNOWN, dtype=np.int64)
+        self.velocity = np.zeros(count, dtype=np.int64)
+        # Number of targets clamped to each motor's limits
+        self.violations = np.zeros(count, dtype=np.int64)
+        # Limits by motor id, for clamping small dictionaries of targets without NumPy overhead
+        self._lower_by_id = [0] * (MAX_DXL_ID + 1)
+        self._upper_by_id = [0] * (MAX_DXL_ID + 1)
+
+    def __len__(self):
+        return len(self.records)
+
+    def index(self, key):
+        """Slot of a motor id (int) or name (str), or -1 if there is no such motor."""
+        if isinstance(key, str):
+            return self.name_to_index.get(key, -1)
+        elif isinstance(key, (int, np.integer)) and not isinstance(key, bool):
+            return self._id_to_index[key] if 0 <= key <= MAX_DXL_ID else -1
+        return -1
+
+    def resolve(self, keys):
+        """Slots of a list of motor ids and/or names as an array, or None if any key is not a motor."""
+        indices = np.fromiter((self.index(key) for key in keys), dtype=np.intp, count=len(keys))
+        if (indices < 0).any():
+            return None
+        return indices
+
+    def set_limits(self, index, lower, upper):
+        self.lower[index] = lower
+        self.upper[index] = upper
+        dxl_id = self.records[index].dxl_id
+        self._lower_by_id[dxl_id] = lower
+        self._upper_by_id[dxl_id] = upper
+
+    def clamp(self, indices, values):
+        '''
+        Clamp DXL values to the limits of the motors in indices, counting the violations.
+        values is an array whose last axis follows indices (one move, or a frames x motors table).
+        Returns (clamped values, mask of values that were changed).
+        '''
+        clamped = np.clip(values, self.lower[indices], self.upper[indices])
+        changed = clamped != values
+        if changed.any():
+            np.add.at(self.violations, indices, changed.reshape(-1, len(indices)).sum(axis=0))
+        return clamped, changed
+
+    def clamp_targets(self, targets):
+        """Clamp a dictionary of motor id to DXL target in place, counting the violations. Returns the ids that were clamped."""
+        lower, upper = self._lower_by_id, self._upper_by_id
+        clamped = [dxl_id for dxl_id, value in targets.items() if value < lower[dxl_id] or value > upper[dxl_id]]
+        for dxl_id in clamped:
+            targets[dxl_id] = min(max(targets[dxl_id], lower[dxl_id]), upper[dxl_id])
+            self.violations[self._id_to_index[dxl_id]] += 1
+        return clamped
+
+    def record_goals(self, targets):
+        """Store commanded goals from a dictionary of motor id to DXL position."""
+        for dxl_id, goal in targets.items():
+            self.goal[self._id_to_index[dxl_id]] = goal
+
+    def goal_of(self, dxl_id):
+        """Last commanded goal of a motor, or None if it has not been commanded."""
+        goal = self.goal[self._id_to_index[dxl_id]]
+        return None if goal == UNKNOWN else int(goal)
+
+    def position_of(self, dxl_id):
+        """Last read position of a motor, or None if it has not been read."""
+        position = self.position[self._id_to_index[dxl_id]]
+        return None if position == UNKNOWN else int(position)
+
+    def goals_dict(self):
+        """Motor id to last commanded goal, for the motors that have been commanded."""
+        return {int(dxl_id): int(goal) for dxl_id, goal in zip(self.ids, self.goal) if goal != UNKNOWN}
+
+    def positions_dict(self):
+        """Motor id to last read position, for the motors that have been read."""
+        return {int(dxl_id): int(position) for dxl_id, position in zip(self.ids, self.position) if position != UNKNOWN}
@@ -0,0 +1,114 @@
+import os
+import glob
+
+import numpy as np
+
+from log_conf import logger
+
+class RingBuffer:
+    '''
+    Fixed-size buffer of the last capacity rows, preallocated as one NumPy array.
+
+    Rows have the given shape and dtype; use a structured dtype to keep a timestamp and several
+    fields per row. Every row is written twice, at i % capacity and i % capacity + capacity,
+    so the latest n rows are always one contiguous slice: latest(n) is a view, not a copy.
+    Views are only valid until the rows they show are overwritten.
+
+    With spill_path set, rows are also written to disk every chunk_size rows, one .npy file per
+    chunk (spill_path.00000.npy, spill_path.00001.npy, ...), before the buffer overwrites them.
+    Read them back with load_spill or merge_spill. One writer thread; readers that can run
+    concurrently with it need their own lock.
+    '''
+    def __init__(self, capacity, shape=(), dtype=np.float64, spill_path=None, chunk_size=None):
+        if capacity <= 0:
+            raise ValueError("RingBuffer capacity must be positive")
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros((2 * capacity,) + tuple(shape), dtype=self.dtype)
+        self.count = 0
+
+        self.spill_path = spill_path
+        self.chunk_size = min(chunk_size or capacity, capacity)
+        self.spilled = 0
+        self.chunks = 0
+
+    def __len__(self):
+        """Number of rows held, at most capacity."""
+        return min(self.count, self.capacity)
+
+    def append(self, row):
+        """Append one row (an array, a scalar or a tuple for a structured dtype)."""
+        i = self.count % self.capacity
+        self._data[i] = row
+        self._data[i + self.capacity] = self._data[i]
+        self.count += 1
+        if self.spill_path is not None and self.count - self.spilled >= self.chunk_size:
+            self._spill()
+
+    def latest(self, n=None):
+        """View of the last n rows (all held rows by default), oldest first. No copy is made."""
+        held = len(self)
+        n = held if n is None else max(0, min(n, held))
+        end = self.count % self.capacity + self.capacity
+        if self.count <= self.capacity:
+            end = self.count
+        return self._data[end - n:end]
+
+    def last(self):
+        """View of the most recent row, or None if the buffer is empty."""
+        if not self.count:
+            return None
+        return self._data[(self.count - 1) % self.capacity]
+
+    def clear(self):
+        """Forget every row, spilling any that are not on disk yet."""
+        self.flush()
+        self.count = 0
+        self.spilled = 0
+
+    def _spill(self):
+        rows = self.latest(self.count - self.spilled)
+        path = f"{self.spill_path}.{self.chunks:05d}.npy"
+        np.save(path, rows)
+        logger.debug("Spilled %d rows to %s", len(rows), path)
+        self.spilled = self.count
+        self.chunks += 1
+
+    def flush(self):
+        """Write the rows not spilled yet to disk (spill_path only)."""
+        if self.spill_path is not None and self.count > self.spilled:
+            self._spill()
+
+def spill_files(spill_path):
+    """Chunk files written by a RingBuffer with this spill_path, in order."""
+    return sorted(glob.glob(glob.escape(spill_path) + ".[0-9][0-9][0-9][0-9][0-9].npy"))
+
+def load_spill(spill_path):
+    """Every row a RingBuffer spilled to spill_path, as one array."""
+    files = spill_files(spill_path)
+    if not files:
+        raise FileNotFoundError(f"No spilled chunks for {spill_path}")
+    return np.concatenate([np.load(path) for path in files])
+
+def merge_spill(spill_path, out_path, remove=True):
+    '''
+    Combine the chunks spilled to spill_path into one .npy file at out_path, one chunk at a time,
+    so the merge runs in constant memory. Removes the chunk files unless remove is False.
+    Returns the number of rows written.
+    '''
+    files = spill_files(spill_path)
+    if not files:
+        raise FileNotFoundError(f"No spilled chunks for {spill_path}")
+    chunks = [np.load(path, mmap_mode="r") for path in files]
+    rows = sum(len(chunk) for chunk in chunks)
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=chunks[0].dtype, shape=(rows,) + chunks[0].shape[1:])
+    start = 0
+    for chunk in chunks:
+        out[start:start + len(chunk)] = chunk
+        start += len(chunk)
+    out.flush()
+    del out, chunks
+    if remove:
+        for path in files:
+            os.remove(path)
+    return rows
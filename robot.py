@@ -3,13 +3,93 @@
 
 # TODO: velocity limit 
 
+import os
 import time
+import asyncio
+import threading
+import numpy as np
 from log_conf import logger
 
 from dynamixel_sdk import *
 
 from control_table_defs import *
 from conversion import *
+from bus_executor import *
+from virtual_bus import VirtualPortHandler
+from motor_registry import *
+from frame_clock import FrameClock
+from ring_buffer import RingBuffer, merge_spill, spill_files
+
+# Bounds and target number of polls for the adaptive move completion interval
+MOVE_POLL_MIN_S = 0.005
+MOVE_POLL_MAX_S = 0.1
+MOVE_POLLS_PER_MOVE = 10
+
+VERIFY_POLICIES = ("none", "sync_read", "sampled", "on_error")
+
+# Shortest move duration turned into a profile velocity, in ms
+MIN_MOVE_DURATION_MS = 50
+
+# Rows held in memory, and written to disk at a time, by a recording with spill_path set
+RECORD_SPILL_CHUNK = 1024
+
+# Bytes a sync write adds around its per-motor data, by protocol
+SYNC_WRITE_OVERHEAD = {1: 8, 2: 14}
+
+class MoveHandle:
+    """
+    Tracks one non-blocking move sent by Robot.move_motors_sync_async or Robot.move_motors_sync.
+    Completion is set by the robot's background move poller. A handle created with watch=False is
+    only handed to the poller when done() or wait() is first called, so moves nobody waits for cost no bus time.
+    status is one of "moving", "complete", "timed_out", "cancelled" or "superseded" (its motors got new targets).
+    """
+    def __init__(self, robot, motor_ids, poll_interval, deadline=None, watch=True):
+        self._robot = robot
+        self.motor_ids = motor_ids
+        self.poll_interval = poll_interval
+        self.deadline = deadline
+        self.status = "moving"
+        self._event = threading.Event()
+        self._watched = watch
+
+    def _watch(self):
+        if not self._watched:
+            self._watched = True
+            if not self._event.is_set():
+                self._robot._watch_move(self)
+
+    def done(self):
+        """Returns True once the move has completed, timed out, been cancelled or been superseded."""
+        self._watch()
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the move is done or timeout seconds pass. Returns True if the move is done."""
+        self._watch()
+        return self._event.wait(timeout)
+
+    def cancel(self):
+        """Stop the motors of this move where they are. Returns False if the move was already done."""
+        if self.done():
+            return False
+        return bool(self._robot._cancel_move(self))
+
+    def _finish(self, status):
+        if not self._event.is_set():
+            self.status = status
+            self._event.set()
+
+class CompiledMove:
+    """
+    A synchronized move converted ahead of time by Robot.compile_moves.
+    packets is a list of (start address, data length, sync write parameter bytes),
+    goals maps motor id to the goal position in DXL units.
+    """
+    __slots__ = ("packets", "goals")
+
+    def __init__(self, packets, goals):
+        self.packets = packets
+        self.goals = goals
 
 class Robot:
     def __init__(self, config_dict):
@@ -22,6 +102,55 @@ class Robot:
         self.baud_rate = config_controllers["baudrate"]
         self.blocking = config_controllers["blocking"]
 
+        # Use an in-process simulated bus instead of a serial port
+        self.virtual = config_controllers.get("virtual", False)
+        self.virtual_options = config_controllers.get("virtual_options", {})
+        # Send profile velocity and goal position in one packet (330s only; XL-320s use separate packets)
+        self.combined_write = config_controllers.get("combined_write", True)
+        # Seconds to wait for a blocking move before giving up (None waits forever)
+        self.move_timeout = config_controllers.get("move_timeout", None)
+
+        # When to read back positions after a move: "none", "sync_read" (every move),
+        # "sampled" (every verify_every moves) or "on_error" (only after a failed move)
+        self.verify_policy = config_controllers.get("verify", "on_error")
+        self.verify_every = config_controllers.get("verify_every", 10)
+        if self.verify_policy not in VERIFY_POLICIES:
+            msg = f"Unknown post-move verification policy: {self.verify_policy}"
+            logger.critical(msg)
+            raise RuntimeError(msg)
+        self._moves_since_verify = 0
+
+        # Background telemetry sampler, see start_telemetry
+        self.telemetry = None
+
+        self.port_open = False
+
+        # Configuration registers read back at startup, and motors whose torque was disabled for an EEPROM write
+        self._config_state = {}
+        self._torque_to_restore = set()
+
+        # Motors already warned about a target outside their angle limits
+        self._limit_warned = set()
+
+        # Moving and present position register readers for subsets of motors, keyed by sorted motor ids
+        self._move_readers = {}
+        self._position_readers = {}
+
+        # Statistics of the last call to record
+        self.last_recording_stats = None
+
+        # Serializes bus transactions between callers and the background move poller.
+        # With bus_executor enabled, one thread owns the port and runs queued transactions by priority.
+        self._bus_lock = threading.RLock()
+        self._bus_executor = None
+
+        # Non-blocking moves tracked by the background move poller
+        self._move_cond = threading.Condition()
+        self._active_moves = set()
+        self._move_poller = None
+        self._move_poller_stop = False
+        self.last_move = None
+
         # Initialize motor configuration from config_motors
         self._initialize_motor_config(config_motors)
 
@@ -31,15 +160,15 @@ class Robot:
         # Initialize port and packet handler
         self._initialize_port()
 
-        # Ping motors to verify connectivity and model type
-        self._ping_motors()
+        # Configure control table constants based on motor type
+        self._configure_control_tables()
+
+        # Read back the configuration registers to verify connectivity and model type
+        self._read_config_state()
 
         # Configure motor limits based on config_motors
         self._configure_motor_limits(config_motors)
 
-        # Configure control table constants based on motor type
-        self._configure_control_tables()
-
         # Initialize group sync read/write objects
         self._initialize_sync_objects()
 
@@ -52,17 +181,29 @@ class Robot:
         # Enforce angle limits on the motors
         self._enforce_angle_limits()
 
+        # Hand the port to a dedicated bus thread if requested
+        if config_controllers.get("bus_executor", False):
+            self._bus_executor = BusExecutor(name=f"bus-executor {self.device_name}")
+            self._bus_executor.start()
+
+    @property
+    def last_positions(self):
+        """Last known present position of each motor that has been read, in DXL units."""
+        return self.motors.positions_dict()
+
+    @property
+    def last_goals(self):
+        """Last commanded goal of each motor that has been moved, in DXL units."""
+        return self.motors.goals_dict()
+
     def _resolve_motor_key(self, key):
         """
         Helper method to resolve a motor key to its motor id.
         Accepts a motor key which can be either an int or a str.
         Returns the motor id if valid, otherwise returns None.
         """
-        if isinstance(key, int):
-            return key if key in self.dxl_ids else None
-        elif isinstance(key, str):
-            return self.name_to_id.get(key, None)
-        return None
+        index = self.motors.index(key)
+        return self.motors.records[index].dxl_id if index >= 0 else None
 
     def _initialize_motor_config(self, config_motors):
         """Initialize motor IDs, names, and conversion dictionaries from config."""
@@ -72,6 +213,8 @@ class Robot:
         self.id_to_name = {}
         self.id_to_limit = {}
         self.name_to_limit = {}
+        # Slots, limits and last known state of every motor, in config order
+        self.motors = MotorRegistry(config_motors)
         model_types = []
         for alias in config_motors:
             # Collect motor IDs and names
@@ -102,13 +245,19 @@ class Robot:
 
     def _initialize_port(self):
         """Initialize the communication port and packet handler."""
-        self.port_handler = PortHandler(self.device_name)
+        if self.virtual:
+            # simulated motors, see virtual_bus.py
+            motors = {dxl_id: model for dxl_id, model in zip(self.dxl_ids, self._model_types)}
+            self.port_handler = VirtualPortHandler(self.device_name, motors, protocol=self.protocol, **self.virtual_options)
+        else:
+            self.port_handler = PortHandler(self.device_name)
         self.packet_handler = PacketHandler(self.protocol)
         if not self.port_handler.openPort():
             msg = f"Failed to open port: {self.device_name}"
             logger.critical(msg)
             raise RuntimeError(msg)
         else:
+            self.port_open = True
             logger.info(f"Successfully opened port: {self.device_name}")
             
         if not self.port_handler.setBaudRate(self.baud_rate):
@@ -147,11 +296,14 @@ class Robot:
 
     def _configure_motor_limits(self, config_motors):
         """Convert and store angle limits for each motor."""
+        # convert every motor's limits in one batch
+        lower = degrees_to_dxl({alias: config_motors[alias]["angle_limit"][0] for alias in config_motors}, self.model_type)
+        upper = degrees_to_dxl({alias: config_motors[alias]["angle_limit"][1] for alias in config_motors}, self.model_type)
         for alias in config_motors:
-            limits = config_motors[alias]["angle_limit"]
-            dxl_limits = [degree_to_dxl(angle, self.model_type) for angle in limits]
+            dxl_limits = [lower[alias], upper[alias]]
             self.id_to_limit[config_motors[alias]["id"]] = dxl_limits
             self.name_to_limit[alias] = dxl_limits
+            self.motors.set_limits(self.motors.name_to_index[alias], *dxl_limits)
 
     def _configure_control_tables(self):
         """Set control table addresses and related constants based on motor type."""
@@ -170,6 +322,7 @@ class Robot:
             self.ADDR_CW_ANGLE_LIMIT = XL320_CONFIG["ADDR_CW_ANGLE_LIMIT"]
             self.ADDR_CCW_ANGLE_LIMIT = XL320_CONFIG["ADDR_CCW_ANGLE_LIMIT"]
             self.VALID_DXL = (0, 1023)
+            self.control_table = CT_XL320_ADDR
 
         elif self.model_type == 1200:
             # XL-330
@@ -187,6 +340,7 @@ class Robot:
             self.ADDR_MAX_POSITION_LIMIT = XL330_CONFIG["ADDR_MAX_POSITION_LIMIT"]
             self.ADDR_MIN_POSITION_LIMIT = XL330_CONFIG["ADDR_MIN_POSITION_LIMIT"]
             self.VALID_DXL = (341, 3755)
+            self.control_table = CT_XL330_ADDR
 
         elif self.model_type == 1230:  # example model type for XC330-M181-T
             # XC-330-M181-T
@@ -204,6 +358,7 @@ class Robot:
             self.ADDR_MAX_POSITION_LIMIT = XC330_CONFIG["ADDR_MAX_POSITION_LIMIT"]
             self.ADDR_MIN_POSITION_LIMIT = XC330_CONFIG["ADDR_MIN_POSITION_LIMIT"]
             self.VALID_DXL = (341, 3755)  # same valid range as XL330, adjust if needed
+            self.control_table = CT_XC330_ADDR
 
 
     def _initialize_sync_objects(self):
@@ -226,6 +381,8 @@ class Robot:
                                                 self.ADDR_PROFILE_VELOCITY, CT_XL330_ADDR[self.ADDR_PROFILE_VELOCITY][1])
             self.group_duration_read = GroupSyncRead(self.port_handler, self.packet_handler, 
                                                     self.ADDR_PROFILE_VELOCITY, CT_XC330_ADDR[self.ADDR_PROFILE_VELOCITY][1])
+            self.group_profile_goal_write = GroupSyncWrite(self.port_handler, self.packet_handler, 
+                                                self.ADDR_PROFILE_VELOCITY, self._profile_goal_length())
 
         elif self.model_type == 1230:
             self.group_goal_write = GroupSyncWrite(self.port_handler, self.packet_handler, 
@@ -238,6 +395,14 @@ class Robot:
                                                   self.ADDR_PROFILE_VELOCITY, CT_XC330_ADDR[self.ADDR_PROFILE_VELOCITY][1])
             self.group_duration_read = GroupSyncRead(self.port_handler, self.packet_handler, 
                                                      self.ADDR_PROFILE_VELOCITY, CT_XC330_ADDR[self.ADDR_PROFILE_VELOCITY][1])
+            self.group_profile_goal_write = GroupSyncWrite(self.port_handler, self.packet_handler, 
+                                                  self.ADDR_PROFILE_VELOCITY, self._profile_goal_length())
+
+    def _profile_goal_length(self):
+        """Length of the contiguous Profile Velocity + Goal Position block (8 bytes on the 330s)."""
+        velocity_len = self.control_table[self.ADDR_PROFILE_VELOCITY][1]
+        assert self.ADDR_PROFILE_VELOCITY + velocity_len == self.ADDR_GOAL_POSITION
+        return velocity_len + self.control_table[self.ADDR_GOAL_POSITION][1]
 
     def _add_sync_params(self):
         """Add motor IDs to sync read parameter storage."""
@@ -256,12 +421,16 @@ class Robot:
     def _prepare_targets(self, args, degrees=True, check_range=True):
         """
         Prepare motor targets from input arguments.
-        Converts motor keys (int or str) to motor ids and, if degrees is True, converts degree values to Dynamixel units.
+        args is a dictionary of motor key (int or str) to target, or an IndexedTargets of registry slots and targets.
+        Converts motor keys to motor ids and, if degrees is True, converts degree values to Dynamixel units.
         If check_range is True, validates that the target values are within each motor's limits.
         Returns a dictionary mapping motor id to target value, or None if a motor key is invalid.
         """
+        if isinstance(args, IndexedTargets):
+            return self._prepare_indexed_targets(args, degrees, check_range)
+
         try:
-            temp = args if not degrees else {key: degree_to_dxl(args[key], self.model_type) for key in args}
+            temp = args if not degrees else degrees_to_dxl(args, self.model_type)
         except Exception as e:
             logger.exception("Error converting degrees to Dynamixel values.")
             raise
@@ -275,55 +444,251 @@ class Robot:
             targets[motor_id] = value
         
         if check_range:
-            for motor_id in targets:
-                lower_limit = self.id_to_limit[motor_id][0]
-                upper_limit = self.id_to_limit[motor_id][1]
-                if targets[motor_id] < lower_limit:
-                    logger.warning("Invalid movement target %d for motor %d. Valid range = %s. Changed to %d",
-                                targets[motor_id], motor_id, self.id_to_limit[motor_id], lower_limit)
-                    targets[motor_id] = lower_limit
-                elif targets[motor_id] > upper_limit:
-                    logger.warning("Invalid movement target %d for motor %d. Valid range = %s. Changed to %d",
-                                targets[motor_id], motor_id, self.id_to_limit[motor_id], upper_limit)
-                    targets[motor_id] = upper_limit
+            clamped = self.motors.clamp_targets(targets)
+            if clamped:
+                self._report_limit_violations(clamped)
         return targets
 
+    def _prepare_indexed_targets(self, args, degrees=True, check_range=True):
+        """
+        Prepare targets already resolved to registry slots (IndexedTargets).
+        Converts and range-checks every target at once against the registry's limit arrays.
+        Returns a dictionary mapping motor id to target value, or None if a slot is invalid.
+        """
+        indices = args.indices
+        if len(indices) and (indices.min() < 0 or indices.max() >= len(self.motors)):
+            logger.error("IndexedTargets slots %s not valid for %d motors.", indices, len(self.motors))
+            return None
+
+        try:
+            values = degrees_to_dxl(args.values, self.model_type) if degrees else np.rint(args.values).astype(np.int64)
+        except Exception as e:
+            logger.exception("Error converting degrees to Dynamixel values.")
+            raise
+
+        if check_range:
+            values, changed = self.motors.clamp(indices, values)
+            if changed.any():
+                self._report_limit_violations(self.motors.ids[indices[changed]].tolist())
+
+        return dict(zip(self.motors.ids[indices].tolist(), values.tolist()))
+
+    def _report_limit_violations(self, motor_ids):
+        """
+        Log targets clamped to the angle limits: a warning the first time a motor is clamped, debug lines afterwards.
+        Every clamped target is counted in limit_violations.
+        """
+        new_ids = [motor_id for motor_id in motor_ids if motor_id not in self._limit_warned]
+        if new_ids:
+            self._limit_warned.update(new_ids)
+            logger.warning("Movement targets for motors %s clamped to their valid range %s. Further violations are only counted (limit_violations).",
+                           new_ids, {motor_id: self.id_to_limit[motor_id] for motor_id in new_ids})
+        else:
+            logger.debug("Movement targets for motors %s clamped to their valid range", motor_ids)
+
+    @property
+    def limit_violations(self):
+        """Total number of movement targets clamped to the motors' angle limits since startup."""
+        return int(self.motors.violations.sum())
+
+    def _to_dxl_bytes(self, value, length):
+        """Split a value into its little-endian bytes for a sync write of the given length."""
+        if length == 1:
+            return [DXL_LOBYTE(value)]
+        elif length == 2:
+            return [DXL_LOBYTE(DXL_LOWORD(value)), DXL_HIBYTE(DXL_LOWORD(value))]
+        return [DXL_LOBYTE(DXL_LOWORD(value)),
+                DXL_HIBYTE(DXL_LOWORD(value)),
+                DXL_LOBYTE(DXL_HIWORD(value)),
+                DXL_HIBYTE(DXL_HIWORD(value))]
+
+    @bus_transaction(PRIORITY_WRITE)
+    def _write_each(self, address, values):
+        """Write one register on each motor in turn. values maps motor id to the value to write."""
+        length = self.control_table[address][1]
+        for dxl_id, value in values.items():
+            if length == 1:
+                self.packet_handler.write1ByteTxRx(self.port_handler, dxl_id, address, value)
+            elif length == 2:
+                self.packet_handler.write2ByteTxRx(self.port_handler, dxl_id, address, value)
+            else:
+                self.packet_handler.write4ByteTxRx(self.port_handler, dxl_id, address, value)
+
+    @bus_transaction(PRIORITY_WRITE)
+    def _sync_write(self, group, params, label):
+        """
+        Send one group sync write packet.
+        params is a dictionary mapping motor id to a list of data bytes.
+        Returns 1 if the packet was sent, 0 otherwise. The parameter storage is always cleared.
+        """
+        for dxl_id, param_bytes in params.items():
+            if not group.addParam(dxl_id, param_bytes):
+                logger.error("[ID:%d] %s addParam failed", dxl_id, label)
+                group.clearParam()
+                return 0
+
+        try:
+            dxl_comm_result = group.txPacket()
+        except Exception:
+            logger.exception("Exception during %s sync write", label)
+            group.clearParam()
+            raise
+
+        group.clearParam()
+        if dxl_comm_result != COMM_SUCCESS:
+            logger.error("%s sync write failed: %s", label, self.packet_handler.getTxRxResult(dxl_comm_result))
+            return 0
+
+        logger.info("%s sync write succeeded.", label)
+        return 1
+
+    def _config_blocks(self):
+        """Control table blocks read back at startup, as (start address, length)."""
+        if self.model_type == 350:
+            # EEPROM area through Torque Limit
+            return [(0, self.ADDR_TORQUE_LIMIT + self.control_table[self.ADDR_TORQUE_LIMIT][1])]
+        # EEPROM area and Torque Enable, then Profile Acceleration and Profile Velocity
+        return [(0, self.ADDR_TORQUE_ENABLE + 1), (self.ADDR_PROFILE_ACCELERATION, self.ADDR_GOAL_POSITION - self.ADDR_PROFILE_ACCELERATION)]
+
+    def _read_config_state(self):
+        """
+        Read the configuration registers of every motor with one sync read per block, and check the model number.
+        If a sync read fails (or on Protocol 1) the motors are pinged and read one at a time instead,
+        so a missing motor is reported the same way as before.
+        """
+        self._config_state = {dxl_id: bytearray(max(start + length for start, length in self._config_blocks()))
+                              for dxl_id in self.dxl_ids}
+        if self.protocol != 2:
+            # Protocol 1 has no sync read
+            self._ping_motors()
+            self._read_config_state_each()
+        elif not self._sync_read_config_state():
+            logger.warning("Configuration sync read failed, reading motors one at a time")
+            self._ping_motors()
+            self._read_config_state_each()
+
+        model_nums = set(self._config_value(dxl_id, 0) for dxl_id in self.dxl_ids)
+        if len(model_nums) > 1:
+            msg = f"Cannot combine motors of different types: {model_nums}"
+            logger.critical(msg)
+            raise RuntimeError(msg)
+        detected = model_nums.pop()
+        if detected != self.model_type:
+            msg = f"Motor type in config file {self.model_type} incompatible with detected type {detected}"
+            logger.critical(msg)
+            raise RuntimeError(msg)
+        logger.info(f"Successfully confirmed model type {self.model_type}")
+
+    def _sync_read_config_state(self):
+        """Fill the configuration state with one group sync read per block. Returns True on success."""
+        for start, length in self._config_blocks():
+            group = GroupSyncRead(self.port_handler, self.packet_handler, start, length)
+            for dxl_id in self.dxl_ids:
+                group.addParam(dxl_id)
+            if group.txRxPacket() != COMM_SUCCESS:
+                return False
+            for dxl_id in self.dxl_ids:
+                if not group.isAvailable(dxl_id, start, length):
+                    return False
+                self._config_state[dxl_id][start:start + length] = bytes(group.data_dict[dxl_id])
+        return True
+
+    def _read_config_state_each(self):
+        """Fill the configuration state with one read per motor and block."""
+        for dxl_id in self.dxl_ids:
+            for start, length in self._config_blocks():
+                data, dxl_comm_result, dxl_error = self.packet_handler.readTxRx(self.port_handler, dxl_id, start, length)
+                if dxl_comm_result != COMM_SUCCESS or dxl_error != 0:
+                    msg = f"[ID:{dxl_id}] Failed to read configuration: {self.packet_handler.getTxRxResult(dxl_comm_result)}"
+                    logger.critical(msg)
+                    raise RuntimeError(msg)
+                self._config_state[dxl_id][start:start + length] = bytes(data)
+
+    def _config_value(self, dxl_id, address):
+        """Value of one register in the configuration state read at startup."""
+        length = self.control_table[address][1]
+        return int.from_bytes(self._config_state[dxl_id][address:address + length], "little")
+
+    def _apply_config(self, address, values, label):
+        """
+        Sync write consecutive registers starting at address, skipping motors that already hold the values.
+        values maps motor id to a list of register values. EEPROM registers are only writable with torque off,
+        so motors that need an EEPROM write have their torque disabled first and restored by _restore_torque.
+        """
+        params = {}
+        for dxl_id, regs in values.items():
+            param_bytes = []
+            reg_address = address
+            for value in regs:
+                length = self.control_table[reg_address][1]
+                param_bytes += self._to_dxl_bytes(value, length)
+                reg_address += length
+            if bytes(param_bytes) != bytes(self._config_state[dxl_id][address:address + len(param_bytes)]):
+                params[dxl_id] = param_bytes
+
+        if not params:
+            logger.info(f"{label} already set on all motors")
+            return 1
+
+        if address < self.ADDR_TORQUE_ENABLE:
+            torque_on = [dxl_id for dxl_id in params if self._config_value(dxl_id, self.ADDR_TORQUE_ENABLE)]
+            if torque_on:
+                self._set_config_torque(torque_on, self.TORQUE_DISABLE)
+                self._torque_to_restore.update(torque_on)
+
+        length = len(next(iter(params.values())))
+        result = self._sync_write(GroupSyncWrite(self.port_handler, self.packet_handler, address, length), params, label)
+        if result:
+            for dxl_id, param_bytes in params.items():
+                self._config_state[dxl_id][address:address + length] = bytes(param_bytes)
+            logger.info(f"Set {label} on motors {sorted(params)}")
+        return result
+
+    def _set_config_torque(self, motor_ids, value):
+        """Sync write Torque Enable on the given motors and record it in the configuration state."""
+        params = {dxl_id: [value] for dxl_id in motor_ids}
+        self._sync_write(GroupSyncWrite(self.port_handler, self.packet_handler, self.ADDR_TORQUE_ENABLE, 1), params, "Torque Enable")
+        for dxl_id in motor_ids:
+            self._config_state[dxl_id][self.ADDR_TORQUE_ENABLE] = value
+
+    def _restore_torque(self):
+        """Re-enable torque on motors that had it disabled for an EEPROM write."""
+        if self._torque_to_restore:
+            self._set_config_torque(sorted(self._torque_to_restore), self.TORQUE_ENABLE)
+            self._torque_to_restore.clear()
+
     def _configure_motors(self, config_controllers):
-        """Configure motor parameters (acceleration, velocity, etc.) based on motor type."""
+        """Configure motor parameters (acceleration, velocity, etc.) based on motor type, writing only values that differ."""
         if self.model_type in (1200, 1230):
             self.acceleration = 100
             self.velocity = 200
             self.moving_threshold = 1
             self.drive_mode = config_controllers["drivemode"]
-            for motor_id in self.dxl_ids:
-                self.packet_handler.write1ByteTxRx(self.port_handler, motor_id, self.ADDR_DRIVE_MODE, self.drive_mode)
-                self.packet_handler.write4ByteTxRx(self.port_handler, motor_id, self.ADDR_PROFILE_ACCELERATION, self.acceleration)
-                self.packet_handler.write4ByteTxRx(self.port_handler, motor_id, self.ADDR_PROFILE_VELOCITY, self.velocity)
-                self.packet_handler.write4ByteTxRx(self.port_handler, motor_id, self.ADDR_MOVING_THRESHOLD, self.moving_threshold)
-                logger.info(f"Set profile acceleration ({self.acceleration}) and velocity ({self.velocity}) set for motor {motor_id}")
+            self._apply_config(self.ADDR_DRIVE_MODE, {dxl_id: [self.drive_mode] for dxl_id in self.dxl_ids}, "drive mode")
+            self._apply_config(self.ADDR_MOVING_THRESHOLD, {dxl_id: [self.moving_threshold] for dxl_id in self.dxl_ids}, "moving threshold")
+            # Profile Acceleration and Profile Velocity are contiguous, one packet for both
+            self._apply_config(self.ADDR_PROFILE_ACCELERATION, {dxl_id: [self.acceleration, self.velocity] for dxl_id in self.dxl_ids},
+                               f"profile acceleration ({self.acceleration}) and velocity ({self.velocity})")
         elif self.model_type == 350:
             self.moving_speed = 100
             self.torque_limit = 512
             self.p_gain = 32
             self.drive_mode = 0
-            for motor_id in self.dxl_ids:
-                self.packet_handler.write2ByteTxRx(self.port_handler, motor_id, self.ADDR_MOVING_SPEED, self.moving_speed)
-                self.packet_handler.write2ByteTxRx(self.port_handler, motor_id, self.ADDR_TORQUE_LIMIT, self.torque_limit)
-                self.packet_handler.write2ByteTxRx(self.port_handler, motor_id, self.ADDR_P_GAIN, self.p_gain)
-                logger.info(f"Set moving speed ({self.moving_speed}), torque limit ({self.torque_limit}), and P gain ({self.p_gain}) set for motor {motor_id}")
+            self._apply_config(self.ADDR_MOVING_SPEED, {dxl_id: [self.moving_speed] for dxl_id in self.dxl_ids}, f"moving speed ({self.moving_speed})")
+            self._apply_config(self.ADDR_TORQUE_LIMIT, {dxl_id: [self.torque_limit] for dxl_id in self.dxl_ids}, f"torque limit ({self.torque_limit})")
+            self._apply_config(self.ADDR_P_GAIN, {dxl_id: [self.p_gain] for dxl_id in self.dxl_ids}, f"P gain ({self.p_gain})")
 
     def _enforce_angle_limits(self):
-        """Write angle limits to the motors based on motor type."""
+        """Write angle limits to the motors based on motor type, only where they differ."""
         if self.model_type in (1200, 1230):
-            for motor_id in self.dxl_ids:
-                self.packet_handler.write4ByteTxRx(self.port_handler, motor_id, self.ADDR_MIN_POSITION_LIMIT, self.id_to_limit[motor_id][0])
-                self.packet_handler.write4ByteTxRx(self.port_handler, motor_id, self.ADDR_MAX_POSITION_LIMIT, self.id_to_limit[motor_id][1])
-                logger.info(f"Set min position limit ({self.id_to_limit[motor_id][0]}), max position limit ({self.id_to_limit[motor_id][1]})")
+            # Max Position Limit is followed by Min Position Limit
+            limits = {dxl_id: [self.id_to_limit[dxl_id][1], self.id_to_limit[dxl_id][0]] for dxl_id in self.dxl_ids}
+            self._apply_config(self.ADDR_MAX_POSITION_LIMIT, limits, "max/min position limits")
         elif self.model_type == 350:
-            for motor_id in self.dxl_ids:
-                self.packet_handler.write2ByteTxRx(self.port_handler, motor_id, self.ADDR_CW_ANGLE_LIMIT, self.id_to_limit[motor_id][0])
-                self.packet_handler.write2ByteTxRx(self.port_handler, motor_id, self.ADDR_CCW_ANGLE_LIMIT, self.id_to_limit[motor_id][1])
-                logger.info(f"Set CW angle limit ({self.id_to_limit[motor_id][0]}), CCW angle limit ({self.id_to_limit[motor_id][1]})")
+            # CW Angle Limit is followed by CCW Angle Limit
+            limits = {dxl_id: [self.id_to_limit[dxl_id][0], self.id_to_limit[dxl_id][1]] for dxl_id in self.dxl_ids}
+            self._apply_config(self.ADDR_CW_ANGLE_LIMIT, limits, "CW/CCW angle limits")
+        self._restore_torque()
 
     def reset(self):
         '''
@@ -359,11 +724,13 @@ class Robot:
             logger.info("Velocity = %s", self.velocity)
             logger.info("Moving Threshold = %s", self.moving_threshold)
 
-    def check_motor_status(self, args):
+    def check_motor_status(self, args, cached=False):
         '''
         Checks the current position of the specified motors. 
+        All positions are read in a single group sync read.
 
         Inputs: args -- a list of str motor names or int ids, or a list containing only the string "all"
+                cached -- if True, report the last known positions without touching the bus
         Returns 1 if successful, 0 if input was invalid. 
         '''
         # if checking all, do not specify additional motors 
@@ -376,28 +743,18 @@ class Robot:
                     logger.error("%s not a valid motor name/id.", elem)
                     return 0
 
-        # get status of all motors 
-        if args[0] == "all":
-            for dxl_id in self.dxl_ids:
-                if self.model_type == 350:
-                    pos, _, _ = self.packet_handler.read2ByteTxRx(self.port_handler, dxl_id, self.ADDR_PRESENT_POSITION)
-                elif self.model_type in (1200, 1230):
-                    pos, _, _ = self.packet_handler.read4ByteTxRx(self.port_handler, dxl_id, self.ADDR_PRESENT_POSITION)
-                logger.info("Status Check: Motor %d Model Type: %d Position: %d", dxl_id, self.model_type, pos)
-        else:
-            for motor in args:
-                motor_id = self._resolve_motor_key(motor)
-                if motor_id is None:
-                    logger.error("%s not a valid motor name/id.", motor)
-                    continue
-                if self.model_type == 350:
-                    pos, _, _ = self.packet_handler.read2ByteTxRx(self.port_handler, motor_id, self.ADDR_PRESENT_POSITION)
-                elif self.model_type in (1200, 1230):
-                    pos, _, _ = self.packet_handler.read4ByteTxRx(self.port_handler, motor_id, self.ADDR_PRESENT_POSITION)
-                logger.info("Status Check: Motor %d Model Type: %d Position: %d", motor_id, self.model_type, pos)
+        motor_ids = self.dxl_ids if args[0] == "all" else [self._resolve_motor_key(motor) for motor in args]
+        positions = self.last_positions if cached else self._read_present_positions()
+
+        for motor_id in motor_ids:
+            if motor_id not in positions:
+                logger.info("Status Check: Motor %d Model Type: %d Position: unknown", motor_id, self.model_type)
+                continue
+            logger.info("Status Check: Motor %d Model Type: %d Position: %d", motor_id, self.model_type, positions[motor_id])
         
         return 1
 
+    @bus_transaction(PRIORITY_READ)
     def get_diagnostic(self, args):
         '''
         Checks the error status of the specified motors 
@@ -437,18 +794,26 @@ class Robot:
         
         return 1
 
+    @bus_transaction(PRIORITY_WRITE)
     def enable_torque(self):
         """Enables torque. Torque must be enabled before motors will move."""
         for motor_id in self.dxl_ids:
             self.packet_handler.write1ByteTxRx(self.port_handler, motor_id, self.ADDR_TORQUE_ENABLE, self.TORQUE_ENABLE)
             logger.info("Torque enabled for Motor %d", motor_id)
 
+    @bus_transaction(PRIORITY_WRITE)
     def disable_torque(self):
         """Disables torque. Torque must be disabled for a clean shutdown, and before setting certain values in the control table."""
         for motor_id in self.dxl_ids:
             self.packet_handler.write1ByteTxRx(self.port_handler, motor_id, self.ADDR_TORQUE_ENABLE, self.TORQUE_DISABLE)
             logger.info("Torque disabled for Motor %d", motor_id)
 
+    @bus_transaction(PRIORITY_EMERGENCY)
+    def emergency_stop(self):
+        """Disables torque on every motor with one broadcast packet. Jumps ahead of queued bus transactions."""
+        self.packet_handler.write1ByteTxOnly(self.port_handler, BROADCAST_ID, self.ADDR_TORQUE_ENABLE, self.TORQUE_DISABLE)
+        logger.warning("Emergency stop: torque disabled for all motors")
+
     def move_motors(self, args, duration=None, degrees=True):
         """Move motors sequentially. If blocking is set in the config, 
         waits for all movements in args to complete before continuing."""
@@ -477,24 +842,21 @@ class Robot:
                         times[self.name_to_id[m]] = duration[m]
                     
             # change the times 
-            for id in times:
-                self.packet_handler.write4ByteTxRx(self.port_handler, id, self.ADDR_PROFILE_VELOCITY, times[id])
+            self._write_each(self.ADDR_PROFILE_VELOCITY, times)
 
         # make the moves 
-        if self.model_type == 350:
-            for dxl_id, goal_position in targets.items():
-                self.packet_handler.write2ByteTxRx(self.port_handler, dxl_id, self.ADDR_GOAL_POSITION, goal_position)
-                logger.info("Motor %d Model Type: %d moved to position %d", dxl_id, self.model_type, goal_position)
-        elif self.model_type in (1200, 1230):
-            for dxl_id, goal_position in targets.items():
-                self.packet_handler.write4ByteTxRx(self.port_handler, dxl_id, self.ADDR_GOAL_POSITION, goal_position)
-                logger.info("Motor %d Model Type: %d moved to position %d", dxl_id, self.model_type, goal_position)
+        self._write_each(self.ADDR_GOAL_POSITION, targets)
+        for dxl_id, goal_position in targets.items():
+            logger.info("Motor %d Model Type: %d moved to position %d", dxl_id, self.model_type, goal_position)
+        self.motors.record_goals(targets)
+        self._supersede_moves(targets)
 
         # spin until completion only if blocking is set to True in the config 
+        completed = True
         if self.blocking:
-            self.check_move_complete()
+            completed = self.check_move_complete(targets.keys(), duration=duration)
 
-        self.check_motor_status(["all"])
+        self._verify_move(ok=completed)
 
         return 1
 
@@ -502,163 +864,259 @@ class Robot:
     def move_motors_sync(self, args, duration=None, degrees=True, velocity=None):
         """Move motors simultaneously using group sync write and read. 
         If blocking is set in config, waits for all movements in args
-        to complete before continuing."""
-        
-        targets = self._prepare_targets(args, degrees=degrees, check_range=False)
+        to complete before continuing. Otherwise returns as soon as the goal 
+        is sent; self.last_move is a handle for the move, which is only polled
+        once its done() or wait() is called."""
+        targets = self._send_sync_move(args, duration=duration, degrees=degrees, velocity=velocity)
         if targets is None:
             return 0
+
+        # Optionally block until move complete
+        completed = True
+        if self.blocking:
+            completed = self.check_move_complete(targets.keys(), duration=duration, velocity=velocity)
+        else:
+            self.last_move = self._track_move(targets, duration=duration, velocity=velocity, watch=False)
+
+        self._verify_move(ok=completed)
+        return 1
+
+    def move_motors_sync_async(self, args, duration=None, degrees=True, velocity=None, timeout=None):
+        """
+        Move motors simultaneously and return immediately, regardless of the blocking setting.
+
+        Returns a MoveHandle as soon as the goal packet is sent, or None if the move could not be sent.
+        The handle's done(), wait(timeout) and cancel() follow the move, which is polled in the background.
+        """
+        targets = self._send_sync_move(args, duration=duration, degrees=degrees, velocity=velocity)
+        if targets is None:
+            return None
+
+        self.last_move = self._track_move(targets, duration=duration, velocity=velocity, timeout=timeout)
+        return self.last_move
+
+    def send_move_sync(self, args, duration=None, degrees=True, velocity=None):
+        """
+        Send a synchronized move and return straight away, without waiting for it,
+        tracking it or verifying it. For schedulers that send the next move on a timer.
+        In time-based mode, motors in velocity use that profile velocity and motors only
+        in duration get one computed from their duration. Returns 1 if sent, 0 otherwise.
+        """
+        return 0 if self._send_sync_move(args, duration=duration, degrees=degrees, velocity=velocity) is None else 1
+
+    def _send_sync_move(self, args, duration=None, degrees=True, velocity=None):
+        """
+        Send the profile velocities and goal positions for a synchronized move.
+        On XL/XC-330s, when every target has a profile velocity the velocity and 
+        goal are sent together in one sync write packet.
+        Returns the dictionary of targets sent (motor id to DXL position), or None on failure.
+        """
+        targets = self._prepare_targets(args, degrees=degrees, check_range=True)
+        if targets is None:
+            return None
         
-        # If velocity is explicitly provided (manual override), convert and write profile velocities
-        if velocity is not None and (self.drive_mode & DRIVE_MODE_TIME != 0):
-            vel_params = {}
-            for m in velocity:
+        profile_velocities = None
+        if (velocity is not None or duration is not None) and (self.drive_mode & DRIVE_MODE_TIME != 0):
+            profile_velocities = {}
+            # If velocity is explicitly provided (manual override), use the raw profile velocities
+            for m in (velocity or {}):
                 motor_id = self._resolve_motor_key(m)
                 if motor_id is None or motor_id not in targets:
                     logger.error("Invalid motor provided in velocity: %s", m)
-                    return 0
+                    return None
 
                 profile_velocity_units = max(int(velocity[m]), 1)  # User gives raw value in Dynamixel units
 
                 logger.debug("Motor %d: user profile velocity = %d", motor_id, profile_velocity_units)
+                profile_velocities[motor_id] = profile_velocity_units
 
-                vel_params[motor_id] = [
-                    DXL_LOBYTE(DXL_LOWORD(profile_velocity_units)),
-                    DXL_HIBYTE(DXL_LOWORD(profile_velocity_units)),
-                    DXL_LOBYTE(DXL_HIWORD(profile_velocity_units)),
-                    DXL_HIBYTE(DXL_HIWORD(profile_velocity_units))
-                ]
-
-            # Sync write to apply user-specified velocities
-            for motor_id, param_bytes in vel_params.items():
-                if not self.group_duration_write.addParam(motor_id, param_bytes):
-                    logger.error("[ID:%d] group_duration_write addParam failed for velocity", motor_id)
-                    self.group_duration_write.clearParam()
-                    return 0
-
-            dxl_comm_result = self.group_duration_write.txPacket()
-            if dxl_comm_result != COMM_SUCCESS:
-                logger.error("Profile velocity sync write failed: %s",
-                            self.packet_handler.getTxRxResult(dxl_comm_result))
-                self.group_duration_write.clearParam()
-                return 0
-            else:
-                logger.info("Profile velocity sync write (user velocity dict) succeeded.")
-            self.group_duration_write.clearParam()
-        elif (duration is not None) and (self.drive_mode & DRIVE_MODE_TIME != 0):
-            times = {}
-            for m in duration:
+            # Durations apply to the motors without an explicit velocity
+            present_positions = None
+            for m in (duration or {}):
                 motor_id = self._resolve_motor_key(m)
                 if motor_id is None or motor_id not in targets:
                     logger.error("Invalid motor provided in duration: %s", m)
-                    return 0
+                    return None
+                if motor_id in profile_velocities:
+                    continue
+
+                if present_positions is None:
+                    # one sync read for every motor instead of a read per motor
+                    present_positions = self._read_present_positions()
+                profile_velocities[motor_id] = self._duration_to_profile_velocity(
+                    motor_id, abs(targets[motor_id] - present_positions[motor_id]), duration[m])
 
-                goal_pos = targets[motor_id]
-                dxl_present_position, _, _ = self.packet_handler.read4ByteTxRx(self.port_handler, motor_id, self.ADDR_PRESENT_POSITION)
-                current_pos = dxl_present_position if dxl_present_position != 0 else 2048  # fallback if read fails
+        for dxl_id, pos in targets.items():
+            logger.debug("Moving ID %d to position %d", dxl_id, pos)
 
-                distance = abs(goal_pos - current_pos)
-                move_time_ms = duration[m]
+        position_len = self.control_table[self.ADDR_GOAL_POSITION][1]
+        if profile_velocities and self.combined_write and profile_velocities.keys() == targets.keys():
+            # Profile Velocity and Goal Position are contiguous: one packet per frame
+            params = {dxl_id: self._to_dxl_bytes(profile_velocities[dxl_id], 4) + self._to_dxl_bytes(targets[dxl_id], 4)
+                      for dxl_id in targets}
+            sent = self._sync_write(self.group_profile_goal_write, params, "Profile velocity and goal position")
+        else:
+            sent = 1
+            if profile_velocities:
+                params = {dxl_id: self._to_dxl_bytes(units, 4) for dxl_id, units in profile_velocities.items()}
+                sent = self._sync_write(self.group_duration_write, params, "Profile velocity")
 
-                # Avoid divide-by-zero and too-slow movements
-                if move_time_ms < 50:
-                    logger.warning("Capping too-short duration (%dms) to 50ms for motor %d", move_time_ms, motor_id)
-                    move_time_ms = 50
+            if sent:
+                params = {dxl_id: self._to_dxl_bytes(pos, position_len) for dxl_id, pos in targets.items()}
+                sent = self._sync_write(self.group_goal_write, params, "Goal position")
 
-                # Velocity = distance (raw steps) / time (ms), then profile velocity = ms per step / 11.2
-                velocity_raw = distance / move_time_ms if move_time_ms > 0 else 1
-                profile_velocity_units = max(int((velocity_raw * 1000) / 11.2), 1) if velocity_raw > 0 else 1
+        if not sent:
+            self._verify_move(ok=False)
+            return None
 
+        self.motors.record_goals(targets)
+        self._supersede_moves(targets)
+        return targets
 
-                logger.debug("Motor %d: dist=%d, time=%dms, vel=%.2f, profile_vel=%d",
-                            motor_id, distance, move_time_ms, velocity_raw, profile_velocity_units)
+    def _duration_to_profile_velocity(self, motor_id, distance, move_time_ms, min_duration_ms=MIN_MOVE_DURATION_MS):
+        """Profile velocity (time-based drive mode) that covers distance DXL steps in move_time_ms,
+        stretching moves shorter than min_duration_ms."""
+        # Avoid divide-by-zero and too-slow movements
+        if move_time_ms < min_duration_ms:
+            logger.warning("Capping too-short duration (%dms) to %dms for motor %d", move_time_ms, min_duration_ms, motor_id)
+            move_time_ms = min_duration_ms
 
-                times[motor_id] = [
-                    DXL_LOBYTE(DXL_LOWORD(profile_velocity_units)),
-                    DXL_HIBYTE(DXL_LOWORD(profile_velocity_units)),
-                    DXL_LOBYTE(DXL_HIWORD(profile_velocity_units)),
-                    DXL_HIBYTE(DXL_HIWORD(profile_velocity_units))
-                ]
+        # Velocity = distance (raw steps) / time (ms), then profile velocity = ms per step / 11.2
+        velocity_raw = distance / move_time_ms if move_time_ms > 0 else 1
+        profile_velocity_units = max(int((velocity_raw * 1000) / 11.2), 1) if velocity_raw > 0 else 1
 
-            # Write profile velocities to motors
-            for motor_id, param_bytes in times.items():
-                if not self.group_duration_write.addParam(motor_id, param_bytes):
-                    logger.error("[ID:%d] group_duration_write addParam failed for duration", motor_id)
-                    self.group_duration_write.clearParam()
-                    return 0
+        logger.debug("Motor %d: dist=%d, time=%dms, vel=%.2f, profile_vel=%d",
+                    motor_id, distance, move_time_ms, velocity_raw, profile_velocity_units)
+        return profile_velocity_units
 
-            dxl_comm_result = self.group_duration_write.txPacket()
-            if dxl_comm_result != COMM_SUCCESS:
-                logger.error("Profile velocity sync write failed: %s",
-                            self.packet_handler.getTxRxResult(dxl_comm_result))
-                self.group_duration_write.clearParam()
-                return 0
+    def compile_moves(self, motor_keys, frame_positions, frame_durations=None, degrees=True, start_positions=None,
+                      min_duration_ms=MIN_MOVE_DURATION_MS):
+        """
+        Convert a list of synchronized moves into ready to send sync write packets, for send_compiled.
+
+        motor_keys are the motor names or ids of every frame's columns, frame_positions and frame_durations
+        are lists of per-frame value lists in the same order. In time-based drive mode each duration becomes
+        a profile velocity, using the previous frame's goals as the starting positions. Durations shorter
+        than min_duration_ms are stretched to it. start_positions (same units as the frames) are used for
+        the first frame; if not given the present positions are read.
+        Returns a list of CompiledMove, or None if a motor key is invalid or a position is not finite.
+        """
+        motor_ids = []
+        for key in motor_keys:
+            motor_id = self._resolve_motor_key(key)
+            if motor_id is None:
+                logger.error("%s not a valid motor name/id.", key)
+                return None
+            motor_ids.append(motor_id)
+
+        def to_dxl(values):
+            return [degree_to_dxl(v, self.model_type) for v in values] if degrees else [int(v) for v in values]
+
+        if degrees and len(frame_positions):
+            frame_positions = np.asarray(frame_positions, dtype=float)
+            if not np.isfinite(frame_positions).all():
+                logger.error("Non-finite positions in frames %s", np.flatnonzero(~np.isfinite(frame_positions).all(axis=-1)).tolist())
+                return None
+            # convert every frame in one vectorized batch
+            frame_goals = degrees_to_dxl(frame_positions, self.model_type)
+        else:
+            frame_goals = np.array([to_dxl(positions) for positions in frame_positions], dtype=np.int64).reshape(-1, len(motor_ids))
+
+        # clamp every frame to the angle limits at once
+        frame_goals, changed = self.motors.clamp(self.motors.resolve(motor_ids), frame_goals)
+        if changed.any():
+            self._report_limit_violations(np.array(motor_ids)[changed.any(axis=0)].tolist())
+        frame_goals = frame_goals.tolist()
+
+        use_profile = frame_durations is not None and self.model_type in (1200, 1230) and (self.drive_mode & DRIVE_MODE_TIME != 0)
+        if use_profile:
+            if start_positions is not None:
+                previous = to_dxl(start_positions)
             else:
-                logger.info("Profile velocity sync write succeeded.")
-            self.group_duration_write.clearParam()
-
-        # Prepare goal positions
-        param_goal_positions = {}
-        if self.model_type == 350:  # 2-byte position
-            for target in targets:
-                val = targets[target]
-                param_goal_positions[target] = [
-                    DXL_LOBYTE(DXL_LOWORD(val)),
-                    DXL_HIBYTE(DXL_LOWORD(val))
-                ]
-        elif self.model_type in (1200, 1230):  # 4-byte position
-            for target in targets:
-                val = targets[target]
-                param_goal_positions[target] = [
-                    DXL_LOBYTE(DXL_LOWORD(val)),
-                    DXL_HIBYTE(DXL_LOWORD(val)),
-                    DXL_LOBYTE(DXL_HIWORD(val)),
-                    DXL_HIBYTE(DXL_HIWORD(val))
-                ]
-
-        # Add goal positions to sync write buffer
-        for dxl_id, param_bytes in param_goal_positions.items():
-            if not self.group_goal_write.addParam(dxl_id, param_bytes):
-                msg = f"[ID:{dxl_id}] group_goal_write addParam failed for position"
-                logger.error(msg)
-                self.group_goal_write.clearParam()
-                raise RuntimeError(msg)
+                present_positions = self._read_present_positions()
+                previous = [present_positions[motor_id] for motor_id in motor_ids]
+
+        position_len = self.control_table[self.ADDR_GOAL_POSITION][1]
+        compiled = []
+        for i, goals in enumerate(frame_goals):
+            goal_param = bytearray()
+            for motor_id, goal in zip(motor_ids, goals):
+                goal_param.append(motor_id)
+                goal_param += bytes(self._to_dxl_bytes(goal, position_len))
+
+            packets = []
+            if use_profile:
+                velocities = [self._duration_to_profile_velocity(motor_id, abs(goal - start), move_time_ms, min_duration_ms)
+                              for motor_id, goal, start, move_time_ms in zip(motor_ids, goals, previous, frame_durations[i])]
+                if self.combined_write:
+                    # Profile Velocity and Goal Position are contiguous: one packet per frame
+                    param = bytearray()
+                    for motor_id, units, goal in zip(motor_ids, velocities, goals):
+                        param.append(motor_id)
+                        param += bytes(self._to_dxl_bytes(units, 4) + self._to_dxl_bytes(goal, 4))
+                    packets.append((self.ADDR_PROFILE_VELOCITY, self._profile_goal_length(), bytes(param)))
+                else:
+                    param = bytearray()
+                    for motor_id, units in zip(motor_ids, velocities):
+                        param.append(motor_id)
+                        param += bytes(self._to_dxl_bytes(units, 4))
+                    packets.append((self.ADDR_PROFILE_VELOCITY, 4, bytes(param)))
+                    packets.append((self.ADDR_GOAL_POSITION, position_len, bytes(goal_param)))
+                previous = goals
+            else:
+                packets.append((self.ADDR_GOAL_POSITION, position_len, bytes(goal_param)))
 
-        for dxl_id, pos in targets.items():
-            logger.debug("Moving ID %d to position %d", dxl_id, pos)
+            compiled.append(CompiledMove(packets, dict(zip(motor_ids, goals))))
+        return compiled
 
-        # Send goal position command
-        try:
-            dxl_comm_result = self.group_goal_write.txPacket()
+    def sync_frame_bytes(self, num_motors, profile=True):
+        """
+        Bytes on the bus for one synchronized move of num_motors motors, as sent by send_move_sync
+        or send_compiled. profile is whether the move carries durations or velocities.
+        """
+        goal_len = self.control_table[self.ADDR_GOAL_POSITION][1]
+        overhead = SYNC_WRITE_OVERHEAD[self.protocol]
+        if not profile or self.model_type == 350 or (self.drive_mode & DRIVE_MODE_TIME == 0):
+            return overhead + num_motors * (1 + goal_len)
+        if self.combined_write:
+            return overhead + num_motors * (1 + self._profile_goal_length())
+        return 2 * overhead + num_motors * (2 + 4 + goal_len)
+
+    @bus_transaction(PRIORITY_WRITE)
+    def send_compiled(self, move):
+        """
+        Send a move prepared by compile_moves as-is. Does not wait for the move or verify it.
+        Its profile velocities assume the motors start from the previous compiled move's goals,
+        so after skipping a move, send the next one with move_motors_sync instead.
+        Returns 1 if every packet was sent, 0 otherwise.
+        """
+        for address, data_length, param in move.packets:
+            dxl_comm_result = self.packet_handler.syncWriteTxOnly(self.port_handler, address, data_length, param, len(param))
             if dxl_comm_result != COMM_SUCCESS:
-                logger.error("Goal position sync write failed: %s",
-                            self.packet_handler.getTxRxResult(dxl_comm_result))
-                self.group_goal_write.clearParam()
+                logger.error("Compiled sync write failed: %s", self.packet_handler.getTxRxResult(dxl_comm_result))
                 return 0
-            else:
-                logger.info("Goal position sync write succeeded.")
-        except Exception:
-            logger.exception("Exception during group_goal_write.txPacket")
-            self.group_goal_write.clearParam()
-            raise
+        self.motors.record_goals(move.goals)
+        self._supersede_moves(move.goals)
+        return 1
 
-        self.group_goal_write.clearParam()
+    def move_compiled(self, move, duration=None):
+        """
+        Send a move prepared by compile_moves and follow it like move_motors_sync: if blocking is
+        set in config, wait for it to complete, otherwise track it as self.last_move, then apply
+        the verification policy. duration is the move's duration dict, used for the poll interval.
+        Returns 1 if sent, 0 otherwise.
+        """
+        if not self.send_compiled(move):
+            self._verify_move(ok=False)
+            return 0
 
-        # Optionally block until move complete
+        completed = True
         if self.blocking:
-            self.check_move_complete()
+            completed = self.check_move_complete(move.goals.keys(), duration=duration)
         else:
-            # If duration dict was provided, wait roughly for the longest move duration in seconds
-            if duration:
-                max_duration_ms = max(duration.values())
-                # Avoid too short waits
-                wait_time_s = max(0.05, max_duration_ms / 1000.0)
-                logger.debug(f"Non-blocking mode: sleeping for {wait_time_s:.3f}s to allow move completion")
-                time.sleep(wait_time_s)
-            else:
-                # If no duration provided, sleep a small default
-                time.sleep(0.05)
+            self.last_move = self._track_move(move.goals, duration=duration, watch=False)
 
-        self.check_motor_status(["all"])
+        self._verify_move(ok=completed)
         return 1
 
     # def move_motors_sync(self, args, duration_ms=250, degrees=True, accel=800, velocity=500):
@@ -708,69 +1166,483 @@ class Robot:
 
 
     
+    def _verify_move(self, ok=True):
+        """
+        Apply the post-move verification policy after a move.
+        ok is False if the move failed to send or did not complete in time.
+        Returns the position snapshot if one was read, otherwise None.
+        """
+        self._moves_since_verify += 1
+
+        if self.verify_policy == "none":
+            return None
+        elif self.verify_policy == "on_error" and ok:
+            return None
+        elif self.verify_policy == "sampled" and self._moves_since_verify < self.verify_every:
+            return None
+
+        self._moves_since_verify = 0
+        positions = self._read_present_positions()
+        logger.debug("Post-move positions: %s", positions)
+        return positions
+
+    def get_last_positions(self):
+        """Returns the last read position of each motor (DXL units) without touching the bus."""
+        return self.last_positions
+
     def get_positions(self):
         ''' Get all positions with group_position_read. May replace check_motor_status.'''
+        return self._read_present_positions()
+
+    @bus_transaction(PRIORITY_READ)
+    def _read_present_positions(self):
+        """
+        Read the present position of every motor in a single group sync read.
+        Motors whose data could not be read fall back to their last known position,
+        then to their last commanded goal, then to the center of the valid range.
+        Returns a dictionary mapping motor id to position in DXL units.
+        """
+        position_len = self.control_table[self.ADDR_PRESENT_POSITION][1]
+
         # Syncread present position
         dxl_comm_result = self.group_position_read.txRxPacket()
         if dxl_comm_result != COMM_SUCCESS:
-            logger.info("%s" % self.packet_handler.getTxRxResult(dxl_comm_result))
-                
+            logger.warning("Present position sync read failed: %s", self.packet_handler.getTxRxResult(dxl_comm_result))
+
         positions = {}
         for dxl_id in self.dxl_ids:
-            if self.model_type == 350:
-                positions[dxl_id] = self.group_position_read.getData(dxl_id, self.ADDR_PRESENT_POSITION, CT_XL320_ADDR[self.ADDR_PRESENT_POSITION][1])
-            elif self.model_type == 1200:
-                positions[dxl_id] = self.group_position_read.getData(dxl_id, self.ADDR_PRESENT_POSITION, CT_XL330_ADDR[self.ADDR_PRESENT_POSITION][1])
-            elif self.model_type == 1230:
-                positions[dxl_id] = self.group_position_read.getData(dxl_id, self.ADDR_PRESENT_POSITION, CT_XC330_ADDR[self.ADDR_PRESENT_POSITION][1])
+            if self.group_position_read.isAvailable(dxl_id, self.ADDR_PRESENT_POSITION, position_len):
+                positions[dxl_id] = self.group_position_read.getData(dxl_id, self.ADDR_PRESENT_POSITION, position_len)
+                self.motors.position[self.motors.index(dxl_id)] = positions[dxl_id]
+            else:
+                fallback = self.motors.position_of(dxl_id)
+                if fallback is None:
+                    fallback = self.motors.goal_of(dxl_id)
+                if fallback is None:
+                    fallback = sum(self.VALID_DXL) // 2
+                logger.debug("[ID:%03d] present position unavailable, using %d", dxl_id, fallback)
+                positions[dxl_id] = fallback
 
         return positions 
 
-    def check_move_complete(self):
-        ''' Given a list of motors, gets the goal and present positions. '''
-         # spin until completion
+    def _get_position_reader(self, motor_ids):
+        """Return a group sync read of the Present Position register for exactly these motors, creating and caching it if needed."""
+        key = tuple(sorted(motor_ids))
+        if key == tuple(sorted(self.dxl_ids)):
+            return self.group_position_read
+
+        reader = self._position_readers.get(key)
+        if reader is None:
+            reader = GroupSyncRead(self.port_handler, self.packet_handler,
+                                   self.ADDR_PRESENT_POSITION, self.control_table[self.ADDR_PRESENT_POSITION][1])
+            for dxl_id in key:
+                if not reader.addParam(dxl_id):
+                    msg = f"[ID:{dxl_id}] position reader addParam failed"
+                    logger.critical(msg)
+                    raise RuntimeError(msg)
+            self._position_readers[key] = reader
+        return reader
+
+    @bus_transaction(PRIORITY_READ)
+    def _sample_positions(self, reader, motor_ids):
+        """
+        Read the present position of motor_ids with one group sync read.
+        Returns (timestamp in perf_counter_ns at the middle of the read, list of positions in motor_ids order),
+        or (timestamp, None) if any motor did not answer.
+        """
+        position_len = self.control_table[self.ADDR_PRESENT_POSITION][1]
+        before = time.perf_counter_ns()
+        dxl_comm_result = reader.txRxPacket()
+        timestamp = (before + time.perf_counter_ns()) // 2
+        if dxl_comm_result != COMM_SUCCESS:
+            logger.debug("Recording sync read failed: %s", self.packet_handler.getTxRxResult(dxl_comm_result))
+            return timestamp, None
+        positions = []
+        for dxl_id in motor_ids:
+            if not reader.isAvailable(dxl_id, self.ADDR_PRESENT_POSITION, position_len):
+                return timestamp, None
+            positions.append(reader.getData(dxl_id, self.ADDR_PRESENT_POSITION, position_len))
+        return timestamp, positions
+
+    def record(self, motor_keys=None, duration=10.0, rate_hz=100.0, degrees=True, stop_event=None,
+               capacity=None, spill_path=None):
+        '''
+        Record the present positions of motor_keys (all motors by default) at rate_hz, for duration seconds
+        or until stop_event (a threading.Event) is set.
+
+        Each sample is one group sync read, scheduled against absolute deadlines by a FrameClock, so the
+        rate does not drift with the time spent reading. Samples whose deadline has already passed by more
+        than half a period are skipped and counted as missed. Samples go into a RingBuffer of capacity rows,
+        enough for the whole duration by default; if it fills up, the oldest samples are overwritten.
+
+        With spill_path set, only capacity rows (RECORD_SPILL_CHUNK by default) are held in memory: they are
+        written to disk in chunks as the buffer fills, merged into one .npy file at spill_path at the end,
+        and samples is a read-only memmap of that file, so memory stays constant however long the recording.
+        ".npy" is added to spill_path if missing, and chunks left over from an interrupted recording to the
+        same spill_path are deleted before recording starts.
+
+        Returns (samples, stats). samples is a structured array with a "time" field (seconds since the
+        first sample, from perf_counter_ns) and one field per motor, named after the motor, in degrees
+        (readings outside the position range are clipped to it) or raw DXL units. stats holds the target and achieved rates, samples returned, samples overwritten,
+        missed deadlines and failed reads, and is also kept in last_recording_stats.
+        '''
+        if motor_keys is None:
+            motor_keys = self.dxl_ids
+        motor_ids = []
+        for key in motor_keys:
+            motor_id = self._resolve_motor_key(key)
+            if motor_id is None:
+                msg = f"{key} not a valid motor name/id."
+                logger.error(msg)
+                raise ValueError(msg)
+            motor_ids.append(motor_id)
+        if duration is None and stop_event is None:
+            raise ValueError("record needs a duration or a stop_event")
+
+        if capacity is None:
+            if spill_path is not None:
+                capacity = RECORD_SPILL_CHUNK
+            elif duration is None:
+                msg = "record without a duration needs a capacity or a spill_path"
+                logger.error(msg)
+                raise ValueError(msg)
+            else:
+                capacity = int(duration * rate_hz) + 1
+        value_type = np.float64 if degrees else np.int32
+        chunk_path = None
+        if spill_path is not None:
+            if not spill_path.endswith(".npy"):
+                spill_path += ".npy"
+            chunk_path = spill_path + ".part"
+            for stale in spill_files(chunk_path):
+                logger.warning("Removing %s, left over from an earlier recording", stale)
+                os.remove(stale)
+        buffer = RingBuffer(capacity, dtype=[("time", np.float64)] + [(self.id_to_name[motor_id], value_type) for motor_id in motor_ids],
+                            spill_path=chunk_path)
+        reader = self._get_position_reader(motor_ids)
+
+        period_ms = 1000.0 / rate_hz
+        clock = FrameClock(policy="drop", drop_threshold_ms=period_ms / 2)
+        failed_reads = 0
+        first_ns = None
+        frame = 0
+        logger.info("Recording motors %s at %.1f Hz", motor_ids, rate_hz)
+        clock.start()
+        while (duration is None or frame * period_ms < duration * 1000.0) and not (stop_event is not None and stop_event.is_set()):
+            if clock.wait_for(frame, frame * period_ms):
+                timestamp, positions = self._sample_positions(reader, motor_ids)
+                if positions is None:
+                    failed_reads += 1
+                else:
+                    if first_ns is None:
+                        first_ns = timestamp
+                    if degrees:
+                        # through the lookup table, clipping readings outside the position range
+                        positions = dxls_to_degree(positions, self.model_type)
+                    buffer.append(((timestamp - first_ns) / 1e9, *positions))
+                    last_ns = timestamp
+            frame += 1
+
+        if spill_path is not None:
+            if buffer.count:
+                buffer.flush()
+                merge_spill(chunk_path, spill_path)
+            else:
+                np.save(spill_path, buffer.latest())
+            samples = np.load(spill_path, mmap_mode="r")
+        else:
+            samples = buffer.latest().copy()
+            if buffer.count > len(samples):
+                logger.warning("Recording kept only the last %d of %d samples, raise capacity or set spill_path to keep them all",
+                               len(samples), buffer.count)
+        span_s = (last_ns - first_ns) / 1e9 if first_ns is not None else 0.0
+        timing = clock.stats()
+        self.last_recording_stats = {
+            "target_hz": rate_hz,
+            "achieved_hz": (buffer.count - 1) / span_s if span_s > 0 else 0.0,
+            "samples": len(samples),
+            "overwritten": buffer.count - len(samples),
+            "missed": len(clock.dropped),
+            "failed_reads": failed_reads,
+            "mean_late_ms": timing["mean_ms"],
+            "max_late_ms": timing["max_ms"],
+        }
+        logger.info("Recorded %d samples at %.1f Hz (target %.1f Hz), %d missed deadlines, %d failed reads",
+                    buffer.count, self.last_recording_stats["achieved_hz"], rate_hz, len(clock.dropped), failed_reads)
+        return samples, self.last_recording_stats
+
+    def _get_move_reader(self, motor_ids):
+        """Return a group sync read of the Moving register for exactly these motors, creating and caching it if needed."""
+        key = tuple(sorted(motor_ids))
+        if key == tuple(sorted(self.dxl_ids)):
+            return self.group_move_read
+
+        reader = self._move_readers.get(key)
+        if reader is None:
+            reader = GroupSyncRead(self.port_handler, self.packet_handler,
+                                   self.ADDR_MOVING, self.control_table[self.ADDR_MOVING][1])
+            for dxl_id in key:
+                if not reader.addParam(dxl_id):
+                    msg = f"[ID:{dxl_id}] move reader addParam failed"
+                    logger.critical(msg)
+                    raise RuntimeError(msg)
+            self._move_readers[key] = reader
+        return reader
+
+    @bus_transaction(PRIORITY_READ)
+    def _read_moving(self, motor_ids):
+        """
+        Read the Moving register of the given motors in one group sync read.
+        Returns a dictionary mapping motor id to its moving flag, or None if the read failed.
+        """
+        reader = self._get_move_reader(motor_ids)
+        moving_len = self.control_table[self.ADDR_MOVING][1]
+
+        # Syncread moving status
+        dxl_comm_result = reader.txRxPacket()
+        if dxl_comm_result != COMM_SUCCESS:
+            logger.error("%s" % self.packet_handler.getTxRxResult(dxl_comm_result))
+            return None
+
+        moving = {}
+        for dxl_id in motor_ids:
+            # Check if groupsyncread data of motor is available
+            if not reader.isAvailable(dxl_id, self.ADDR_MOVING, moving_len):
+                logger.error("[ID:%03d] group_move_read getdata failed" % dxl_id)
+                return None
+
+            # Get motor moving status
+            moving[dxl_id] = bool(reader.getData(dxl_id, self.ADDR_MOVING, moving_len))
+        return moving
+
+    def _expected_move_time(self, motor_ids, duration=None, velocity=None):
+        """
+        Estimate how long the commanded move takes, in seconds.
+        Uses the duration dict, or the profile velocity and the distance still to travel.
+        Returns None if no estimate can be made.
+        """
+        if duration:
+            return max(duration.values()) / 1000.0
+
+        if self.drive_mode & DRIVE_MODE_TIME != 0:
+            # in a time-based profile the profile velocity register holds the move time in ms
+            return max(velocity.values()) / 1000.0 if velocity else None
+
+        if self.model_type == 350:
+            speed_units, rpm_per_unit, steps_per_rev = self.moving_speed, 0.111, 1024 * 360.0 / 300.0
+        else:
+            speed_units, rpm_per_unit, steps_per_rev = self.velocity, 0.229, 4096
+        if speed_units == 0:
+            # 0 means maximum speed / no limit
+            return None
+
+        indices = self.motors.resolve(motor_ids)
+        goals = self.motors.goal[indices]
+        positions = self.motors.position[indices]
+        known = (goals != UNKNOWN) & (positions != UNKNOWN)
+        if not known.any():
+            return None
+        return float(np.abs(goals[known] - positions[known]).max()) / (speed_units * rpm_per_unit * steps_per_rev / 60.0)
+
+    def _prepare_move_wait(self, motor_ids, duration, velocity, timeout, poll_interval):
+        """Resolve the motors to poll, the poll interval and the deadline for a completion wait."""
+        if motor_ids is None:
+            motor_ids = self.dxl_ids
+        motor_ids = [self._resolve_motor_key(m) for m in motor_ids]
+        if None in motor_ids:
+            msg = "Invalid motor provided to move completion wait."
+            logger.error(msg)
+            raise ValueError(msg)
+
+        if poll_interval is None:
+            expected_s = self._expected_move_time(motor_ids, duration=duration, velocity=velocity)
+            if expected_s is None:
+                poll_interval = MOVE_POLL_MAX_S
+            else:
+                poll_interval = min(MOVE_POLL_MAX_S, max(MOVE_POLL_MIN_S, expected_s / MOVE_POLLS_PER_MOVE))
+
+        if timeout is None:
+            timeout = self.move_timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        return motor_ids, poll_interval, deadline
+
+    def _track_move(self, targets, duration=None, velocity=None, timeout=None, watch=True):
+        """Create the MoveHandle of a sent move and, if watch is True, register it with the background poller."""
+        motor_ids, poll_interval, deadline = self._prepare_move_wait(targets.keys(), duration, velocity, timeout, None)
+        handle = MoveHandle(self, motor_ids, poll_interval, deadline, watch=watch)
+        if watch:
+            self._watch_move(handle)
+        return handle
+
+    def _watch_move(self, handle):
+        """Hand a MoveHandle to the background poller, starting it if needed."""
+        with self._move_cond:
+            if self._move_poller is None or not self._move_poller.is_alive():
+                self._move_poller_stop = False
+                self._move_poller = threading.Thread(target=self._move_poller_loop, name="move-poller", daemon=True)
+                self._move_poller.start()
+            self._active_moves.add(handle)
+            self._move_cond.notify()
+
+    def _supersede_moves(self, targets):
+        """Finish the tracked moves whose motors all got new targets, and stop polling them."""
+        last = self.last_move
+        if not self._active_moves and (last is None or last._event.is_set()):
+            return
+        motor_ids = targets.keys()
+        with self._move_cond:
+            superseded = [handle for handle in self._active_moves if motor_ids >= set(handle.motor_ids)]
+            self._active_moves.difference_update(superseded)
+        if last is not None and motor_ids >= set(last.motor_ids):
+            superseded.append(last)
+        for handle in superseded:
+            handle._finish("superseded")
+
+    def _move_poller_loop(self):
+        """Background thread: polls the Moving register of all motors with active moves and completes their handles."""
         while 1:
-            goal_reached = 0
-            time.sleep(0.1)
+            with self._move_cond:
+                while not self._active_moves and not self._move_poller_stop:
+                    self._move_cond.wait()
+                if self._move_poller_stop:
+                    return
+                handles = list(self._active_moves)
+
+            time.sleep(min(handle.poll_interval for handle in handles))
+
+            # skip the read if every move was cancelled while sleeping
+            finished = [handle for handle in handles if handle._event.is_set()]
+            handles = [handle for handle in handles if not handle._event.is_set()]
+            moving = None
+            if handles:
+                motor_ids = sorted(set().union(*(handle.motor_ids for handle in handles)))
+                moving = self._read_moving(motor_ids)
+            now = time.monotonic()
+
+            for handle in handles:
+                if moving is not None and not any(moving[dxl_id] for dxl_id in handle.motor_ids):
+                    handle._finish("complete")
+                    finished.append(handle)
+                elif handle.deadline is not None and now >= handle.deadline:
+                    logger.warning("Timed out waiting for motors %s to finish moving", handle.motor_ids)
+                    handle._finish("timed_out")
+                    finished.append(handle)
+
+            with self._move_cond:
+                self._active_moves.difference_update(finished)
+
+    def _stop_move_poller(self):
+        """Stop the background move poller, if running, and release any waiters."""
+        with self._move_cond:
+            self._move_poller_stop = True
+            self._move_cond.notify()
+            handles = list(self._active_moves)
+            self._active_moves.clear()
+        if self._move_poller is not None:
+            self._move_poller.join()
+            self._move_poller = None
+        for handle in handles:
+            handle._finish("cancelled")
+
+    def _cancel_move(self, handle):
+        """Halt the motors of a move by commanding them to hold their present position."""
+        positions = self._read_present_positions()
+        position_len = self.control_table[self.ADDR_GOAL_POSITION][1]
+        params = {dxl_id: self._to_dxl_bytes(positions[dxl_id], position_len) for dxl_id in handle.motor_ids}
+        sent = self._sync_write(self.group_goal_write, params, "Cancel goal position")
+        if sent:
+            self.motors.record_goals({dxl_id: positions[dxl_id] for dxl_id in handle.motor_ids})
+        handle._finish("cancelled")
+        return sent
+
+    def check_move_complete(self, motor_ids=None, duration=None, velocity=None, timeout=None, poll_interval=None):
+        """
+        Spin until the given motors stop moving.
 
-            # Syncread moving status
-            dxl_comm_result = self.group_move_read.txRxPacket()
-            if dxl_comm_result != COMM_SUCCESS:
-                logger.error("%s" % self.packet_handler.getTxRxResult(dxl_comm_result))
-                continue
+        Inputs: motor_ids -- motor names or ids to wait for (default: all motors)
+                duration, velocity -- the dicts passed to the move, used to pick the poll interval
+                timeout -- seconds to wait before giving up (default: move_timeout from the config, or forever)
+                poll_interval -- seconds between polls, overriding the adaptive interval
+        Returns True if the move completed, False if the wait timed out.
+        """
+        motor_ids, poll_interval, deadline = self._prepare_move_wait(motor_ids, duration, velocity, timeout, poll_interval)
 
-            for dxl_id in self.dxl_ids:
-                # Check if groupsyncread data of motor is available
-                if self.model_type == 350:
-                    dxl_getdata_result = self.group_move_read.isAvailable(dxl_id, self.ADDR_MOVING, CT_XL320_ADDR[self.ADDR_MOVING][1])
-                    if dxl_getdata_result != True:
-                        logger.error("[ID:%03d] group_move_read getdata failed" % dxl_id)
-
-                    # Get motor moving status
-                    moving = self.group_move_read.getData(dxl_id, self.ADDR_MOVING, CT_XL320_ADDR[self.ADDR_MOVING][1])
-                elif self.model_type == 1200:
-                    dxl_getdata_result = self.group_move_read.isAvailable(dxl_id, self.ADDR_MOVING, CT_XL330_ADDR[self.ADDR_MOVING][1])
-                    if dxl_getdata_result != True:
-                        logger.error("[ID:%03d] group_move_read getdata failed" % dxl_id)
-
-                    # Get motor moving status
-                    moving = self.group_move_read.getData(dxl_id, self.ADDR_MOVING, CT_XL330_ADDR[self.ADDR_MOVING][1])
-                elif self.model_type == 1230:
-                    dxl_getdata_result = self.group_move_read.isAvailable(dxl_id, self.ADDR_MOVING, CT_XC330_ADDR[self.ADDR_MOVING][1])
-                    if dxl_getdata_result != True:
-                        logger.error("[ID:%03d] group_move_read getdata failed" % dxl_id)
-
-                    # Get motor moving status
-                    moving = self.group_move_read.getData(dxl_id, self.ADDR_MOVING, CT_XC330_ADDR[self.ADDR_MOVING][1])
-
-                if not moving:
-                    goal_reached += 1
-                
-            if goal_reached == len(self.dxl_ids):
-                break
+        # spin until completion
+        while 1:
+            time.sleep(poll_interval)
+
+            moving = self._read_moving(motor_ids)
+            if moving is not None and not any(moving.values()):
+                return True
+
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning("Timed out waiting for motors %s to finish moving", motor_ids)
+                return False
+
+    async def check_move_complete_async(self, motor_ids=None, duration=None, velocity=None, timeout=None, poll_interval=None):
+        """Awaitable version of check_move_complete. Yields to the event loop between polls, and runs each bus read in a worker thread."""
+        motor_ids, poll_interval, deadline = self._prepare_move_wait(motor_ids, duration, velocity, timeout, poll_interval)
+
+        while 1:
+            await asyncio.sleep(poll_interval)
+
+            moving = await asyncio.to_thread(self._read_moving, motor_ids)
+            if moving is not None and not any(moving.values()):
+                return True
 
-        return 
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning("Timed out waiting for motors %s to finish moving", motor_ids)
+                return False
     
+    @bus_transaction(PRIORITY_READ)
+    def ping(self, motor_id=None):
+        """
+        Ping one motor (the first configured motor by default) as a cheap connection check.
+        Returns 1 if it answered, 0 otherwise.
+        """
+        if not self.port_open:
+            return 0
+        if motor_id is None:
+            motor_id = self.dxl_ids[0]
+        try:
+            _, dxl_comm_result, dxl_error = self.packet_handler.ping(self.port_handler, motor_id)
+        except Exception:
+            logger.exception("[ID:%d] Ping failed", motor_id)
+            return 0
+        if dxl_comm_result != COMM_SUCCESS:
+            logger.warning("[ID:%d] Ping failed: %s", motor_id, self.packet_handler.getTxRxResult(dxl_comm_result))
+            return 0
+        return 1
+
+    @bus_transaction(PRIORITY_TELEMETRY)
+    def _read_block(self, reader, address, length):
+        """
+        Run a prepared group sync read of length bytes at address, at telemetry priority.
+        Returns a dictionary mapping motor id to the raw bytes read, for the motors that answered.
+        """
+        dxl_comm_result = reader.txRxPacket()
+        if dxl_comm_result != COMM_SUCCESS:
+            logger.debug("Block sync read at %d failed: %s", address, self.packet_handler.getTxRxResult(dxl_comm_result))
+        return {dxl_id: bytes(data) for dxl_id, data in reader.data_dict.items()
+                if reader.isAvailable(dxl_id, address, length)}
+
+    def start_telemetry(self, **kwargs):
+        """
+        Start a background TelemetrySampler (see telemetry.py) with the given options, replacing any running one.
+        Returns the sampler; its latest() snapshot is read without touching the bus.
+        """
+        from telemetry import TelemetrySampler
+        self.stop_telemetry()
+        self.telemetry = TelemetrySampler(self, **kwargs)
+        self.telemetry.start()
+        return self.telemetry
+
+    def stop_telemetry(self):
+        """Stop the background telemetry sampler, if one is running. Its samples stay available."""
+        if self.telemetry is not None:
+            self.telemetry.stop()
+
     def get_motor_ids(self):
         """Returns the list of motor ids."""
         return self.dxl_ids
@@ -779,8 +1651,15 @@ class Robot:
         """Makes a clean shutdown of the motors."""
         logger.info("Initiating shutdown...")
 
+        self._stop_move_poller()
+        self.stop_telemetry()
+
         self.disable_torque()
 
+        if self._bus_executor is not None:
+            self._bus_executor.stop()
+
         self.port_handler.closePort()
+        self.port_open = False
 
         logger.info("Shutdown complete.")
\ No newline at end of file
@@ -0,0 +1,73 @@
+import json
+import atexit
+import hashlib
+import threading
+
+from log_conf import logger
+
+from robot import Robot
+
+# Open robots keyed by (port, config hash)
+_robots = {}
+_pool_lock = threading.Lock()
+
+def config_key(config_dict):
+    """Registry key for a configuration: its port and a hash of the whole dictionary."""
+    encoded = json.dumps(config_dict, sort_keys=True, default=str).encode("utf-8")
+    return (config_dict["controllers"]["port"], hashlib.sha1(encoded).hexdigest())
+
+def get_robot(config_dict):
+    '''
+    Returns the open, configured Robot for config_dict, creating it on first use.
+
+    A pooled robot is health checked with a ping before it is handed out. If the check fails
+    (port error, unplugged U2D2, robot shut down) it is closed and a new one is connected.
+    Only one robot is kept per port, so asking for a different configuration on the same port closes the old one.
+    Do not call clean_shutdown on a pooled robot; use release_robot or close_all.
+    '''
+    key = config_key(config_dict)
+    with _pool_lock:
+        robot = _robots.get(key)
+        if robot is not None:
+            if robot.ping():
+                return robot
+            logger.warning("Pooled robot on %s failed its health check, reconnecting", key[0])
+            _close(_robots.pop(key))
+
+        for other_key in [k for k in _robots if k[0] == key[0]]:
+            logger.info("Closing robot on %s opened with a different configuration", key[0])
+            _close(_robots.pop(other_key))
+
+        robot = Robot(config_dict=config_dict)
+        _robots[key] = robot
+        logger.info("Added robot on %s to the pool", key[0])
+        return robot
+
+def release_robot(config_dict):
+    """Shut down and remove the pooled robot for config_dict, if there is one."""
+    with _pool_lock:
+        robot = _robots.pop(config_key(config_dict), None)
+        if robot is not None:
+            _close(robot)
+
+def close_all():
+    """Shut down every pooled robot. Registered to run at interpreter exit."""
+    with _pool_lock:
+        while _robots:
+            _close(_robots.popitem()[1])
+
+def _close(robot):
+    if not robot.port_open:
+        return
+    try:
+        robot.clean_shutdown()
+    except Exception:
+        # the port is probably gone, just make sure it is released
+        logger.exception("Clean shutdown of pooled robot on %s failed", robot.device_name)
+        try:
+            robot.port_handler.closePort()
+        except Exception:
+            pass
+        robot.port_open = False
+
+atexit.register(close_all)
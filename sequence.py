@@ -1,28 +1,75 @@
-import time 
+import os
+import hashlib
+import threading
+from collections import OrderedDict
 from log_conf import logger
 
 import json
 import jsonschema
-from jsonschema import validate
 
 from robot import *
+from frame_clock import FrameClock
+from sequence_binary import BinarySequenceFile, FrameRows, BINARY_EXTENSION, POSITION_SCALE
 
 SCHEMA_PATH = "Sequences/sequence_schema.json"
 
+# (schema file mtime, schema, validator), rebuilt only when the schema file changes
+_schema_cache = {}
+
+# guards Sequence._playing and Sequence._close_pending across threads
+_close_lock = threading.Lock()
+
+def get_schema_validator():
+    """Returns the sequence schema and a validator for it, loading and checking the schema file once."""
+    mtime = os.stat(SCHEMA_PATH).st_mtime_ns
+    cached = _schema_cache.get(SCHEMA_PATH)
+    if cached is None or cached[0] != mtime:
+        with open(SCHEMA_PATH, "r") as schema_file:
+            schema = json.load(schema_file)
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        cached = (mtime, schema, validator_class(schema))
+        _schema_cache[SCHEMA_PATH] = cached
+    return cached[1], cached[2]
+
 class Sequence():
+    # compiled frames shorter than this are stretched to it
+    min_move_duration_ms = MIN_MOVE_DURATION_MS
+
+    # memory-mapped binary file, if loaded from one, and playbacks in progress (see close)
+    binary = None
+    _playing = 0
+    _close_pending = False
+
     def __init__(self, file_name, robot_config):
-        # Load and validate the sequence file
-        self.seq_dict = self.load_and_validate(file_name)
+        if file_name.endswith(BINARY_EXTENSION):
+            # memory-map the binary sequence, frames are read from the file as they play
+            self.binary = self.load_binary(file_name)
+            self.seq_dict = {"animation": self.binary.name, "motors": self.binary.motors, "model_type": self.binary.model_type}
+            self.name = self.binary.name
+            self.motors_used, self.frame_times, self.frame_positions, self.frame_durations = self.interpret_binary(robot_config)
+        else:
+            # Load and validate the sequence file
+            self.binary = None
+            self.seq_dict = self.load_and_validate(file_name)
 
-        # get the name of the animation 
-        self.name = self.seq_dict['animation']
+            # get the name of the animation 
+            self.name = self.seq_dict['animation']
 
-        # get a list of motors, frame times, and frame positions 
-        # frame times and positions should be of the same length 
-        self.motors_used, self.frame_times, self.frame_positions, self.frame_durations = self.interpret_sequence(robot_config)
+            # get a list of motors, frame times, and frame positions 
+            # frame times and positions should be of the same length 
+            self.motors_used, self.frame_times, self.frame_positions, self.frame_durations = self.interpret_sequence(robot_config)
 
         self.num_frames = len(self.frame_positions)
 
+        # sync write packets prepared by compile(), and the robot they were prepared for
+        self.compiled_frames = None
+        self.compiled_robot = None
+
+        # per-frame lateness in ms and a summary, filled in by play_sequence
+        self.lateness_ms = []
+        self.timing_stats = None
+
     def load_and_validate(self, file_path):
         """Load the JSON sequence from file, validate it against the schema, and return the JSON data."""
         try:
@@ -30,12 +77,9 @@ class Sequence():
             with open(file_path, "r") as json_file:
                 json_data = json.load(json_file)
 
-            # Load JSON Schema from file
-            with open(SCHEMA_PATH, "r") as schema_file:
-                schema = json.load(schema_file)
-
             # Validate JSON against the schema
-            validate(instance=json_data, schema=schema)
+            _, validator = get_schema_validator()
+            validator.validate(json_data)
 
             logger.info("Sequence is valid against the schema!")
             return json_data
@@ -97,38 +141,237 @@ class Sequence():
 
         return (motors_used, frame_times, frame_positions, frame_durations)
 
-    def play_sequence(self, robot=None):
+    def compile(self, robot):
+        """Convert every frame after the first into ready to send sync write packets for robot.
+        The first frame is still sent with move_motors_sync when played, since it starts from 
+        wherever the robot is; later frames start from the previous frame's goals.
+        Returns 1 on success, 0 otherwise."""
+        compiled = robot.compile_moves(self.motors_used, self.frame_positions[1:], self.frame_durations[1:],
+                                       degrees=True, start_positions=self.frame_positions[0] if self.num_frames else None,
+                                       min_duration_ms=self.min_move_duration_ms)
+        if compiled is None:
+            logger.error("Failed to compile sequence %s", self.name)
+            return 0
+        self.compiled_frames = compiled
+        self.compiled_robot = robot
+        logger.info("Compiled %d frames of sequence %s", len(compiled), self.name)
+        return 1
+
+    def load_binary(self, file_path):
+        """Memory-map a binary sequence file (see sequence_binary.py)."""
+        try:
+            return BinarySequenceFile(file_path)
+
+        except FileNotFoundError as e:
+            logger.critical("File not found: %s", e)
+            quit()
+
+        except Exception as e:
+            logger.critical("Invalid binary sequence: %s", e)
+            quit()
+
+    def interpret_binary(self, robot_config):
+        """Same as interpret_sequence for a binary sequence. Frame times are a view into 
+        the file, and frame positions and durations are read from it frame by frame."""
+        config_types = set(motor["type"] for motor in robot_config["motors"].values())
+        if self.binary.model_type and config_types != {self.binary.model_type}:
+            logger.warning("Sequence %s was made for motor type %d, robot config uses %s",
+                           self.name, self.binary.model_type, config_types)
+
+        available_motors = set(robot_config["motors"].keys())
+        valid_indices = [i for i, motor in enumerate(self.binary.motors) if motor in available_motors]
+        motors_used = [self.binary.motors[i] for i in valid_indices]
+
+        num_motors = self.binary.num_motors
+        frame_positions = FrameRows(self.binary.positions, num_motors, valid_indices, POSITION_SCALE)
+        frame_durations = FrameRows(self.binary.durations, num_motors, valid_indices)
+        return (motors_used, self.binary.millis, frame_positions, frame_durations)
+
+    def _frames(self):
+        """Yields (index, time in ms, positions, durations, is last frame) for each frame."""
+        for i in range(self.num_frames):
+            yield i, self.frame_times[i], self.frame_positions[i], self.frame_durations[i], i == self.num_frames - 1
+
+    def play_sequence(self, robot=None, clock=None, blocking=None):
+        """Play every frame at its time. clock is a FrameClock that decides how
+        frames are scheduled and what happens to late frames (defaults to 
+        FrameClock() with the catch_up policy). After playback the per-frame 
+        lateness is in self.lateness_ms and a summary in self.timing_stats.
+        With blocking (the robot's blocking setting by default), compiled frames 
+        are sent with robot.move_compiled, so they block and are verified like 
+        move_motors_sync. With blocking=False every frame is sent fire-and-forget 
+        (send_compiled or send_move_sync) and only the clock paces playback. 
+        Compiled durations assume the previous frame was sent, so the frame after 
+        a dropped one is sent from the present positions instead."""
+        if clock is None:
+            clock = FrameClock()
+        if blocking is None:
+            blocking = robot.blocking
+
+        with _close_lock:
+            self._playing += 1
+        try:
+            return self._play(robot, clock, blocking)
+        finally:
+            with _close_lock:
+                self._playing -= 1
+                close = self._close_pending and not self._playing
+            if close:
+                self.close()
+
+    def _play(self, robot, clock, blocking):
+        """The playback loop of play_sequence."""
+        # use the precompiled frames if they were made for this robot
+        compiled = self.compiled_frames if self.compiled_robot is robot else None
+
         # start time
-        start_time = time.monotonic_ns()
+        clock.start()
+        after_drop = False
 
          # iterate through the list of frames in the sequence
-        for i in range(self.num_frames):
-            # get args for motor movement
-            args = {motor: pos for motor, pos in zip(self.motors_used, self.frame_positions[i])}
-            # get durations for motor movement 
-            durations = {motor: dur for motor, dur in zip(self.motors_used, self.frame_durations[i])}
-
-            delta_time_ms = (time.monotonic_ns() - start_time) / 1000000.0
-            t_delay_ms = self.frame_times[i] - delta_time_ms
-
-            if t_delay_ms > 0:
-                t_delay_s = t_delay_ms / 1000.0
-                logger.info("Frame %d begins in %2.4f seconds", i, t_delay_s)
-                time.sleep(t_delay_s)
-            else:
-                logger.warning("Frame %d is late by %2.4f ms; skipping sleep", i, abs(t_delay_ms))
+        for i, frame_ms, positions, durations, last in self._frames():
+            # never drop the first or last frame, they set the start and end pose
+            if not clock.wait_for(i, frame_ms, droppable=0 < i and not last):
+                after_drop = True
+                continue
 
            # move robot
             logger.info("Frame %d starting", i)
-            robot.move_motors_sync(args, duration=durations, degrees=True)
+            # get durations for motor movement
+            durations = {motor: dur for motor, dur in zip(self.motors_used, durations)}
+            if compiled is not None and i > 0 and not after_drop:
+                if blocking:
+                    robot.move_compiled(compiled[i - 1], duration=durations)
+                else:
+                    robot.send_compiled(compiled[i - 1])
+            else:
+                # get args for motor movement
+                args = {motor: pos for motor, pos in zip(self.motors_used, positions)}
+                if blocking:
+                    robot.move_motors_sync(args, duration=durations, degrees=True)
+                else:
+                    robot.send_move_sync(args, duration=durations, degrees=True)
+            after_drop = False
             logger.info("Frame: %d ended", i)
+
+        self.lateness_ms = clock.lateness_ms
+        self.timing_stats = clock.stats()
+        logger.info("Sequence %s timing: %s", self.name, self.timing_stats)
             
         return 1
 
+    def close(self):
+        """Unmap the binary sequence file, if any. A sequence that is playing is closed once playback ends.
+        The frames of a binary sequence cannot be read after it is closed."""
+        if self.binary is None:
+            return
+        with _close_lock:
+            if self._playing:
+                self._close_pending = True
+                return
+            self._close_pending = False
+            self.binary.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def to_string(self):
         logger.info("Name: %s", self.name)
         logger.info("Sequences: %s", self.seq_dict)
         logger.info("Motors: %s", self.motors_used)
         logger.info("Frame Times: %s", self.frame_times)
         logger.info("Frame Positions: %s", self.frame_positions)
-        logger.info("Frame Durations: %s", self.frame_durations)
\ No newline at end of file
+        logger.info("Frame Durations: %s", self.frame_durations)
+
+# default for SequenceCache.resize arguments that keep their current value
+_UNCHANGED = object()
+
+class SequenceCache:
+    """
+    Least recently used cache of interpreted Sequence objects, so replaying an animation skips 
+    loading, validating and interpreting it (and keeps any compiled frames).
+
+    Entries are keyed by the file's absolute path, its mtime and size (or a hash of its contents 
+    if hash_contents is set), and the robot's motor configuration, so an edited file or a different 
+    robot gets a fresh Sequence. The least recently used entries are evicted once there are more 
+    than max_entries sequences or, if max_frames is set, more than max_frames frames in total.
+    Sequences dropped from the cache are closed (after playback, if they are playing).
+    """
+    def __init__(self, max_entries=32, max_frames=None, hash_contents=False):
+        self.max_entries = max_entries
+        self.max_frames = max_frames
+        self.hash_contents = hash_contents
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, file_name, robot_config):
+        path = os.path.abspath(file_name)
+        if self.hash_contents:
+            with open(path, "rb") as f:
+                version = hashlib.sha1(f.read()).hexdigest()
+        else:
+            stat = os.stat(path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        config = json.dumps(robot_config["motors"], sort_keys=True, default=str)
+        return (path, version, config)
+
+    def get(self, file_name, robot_config):
+        """Returns the cached Sequence for file_name and robot_config, loading it on a miss."""
+        key = self._key(file_name, robot_config)
+        with self._lock:
+            sequence = self._entries.get(key)
+            if sequence is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sequence
+
+        sequence = Sequence(file_name, robot_config)
+        with self._lock:
+            self.misses += 1
+            # drop stale versions of the same file for the same robot configuration
+            for old_key in [k for k in self._entries if k[0] == key[0] and k[2] == key[2] and k[1] != key[1]]:
+                self._entries.pop(old_key).close()
+            self._entries[key] = sequence
+            self._evict()
+        return sequence
+
+    def _evict(self):
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or
+                                          (self.max_frames is not None and self._frames() > self.max_frames)):
+            key, sequence = self._entries.popitem(last=False)
+            sequence.close()
+            logger.info("Evicted %s from the sequence cache", key[0])
+
+    def _frames(self):
+        return sum(sequence.num_frames for sequence in self._entries.values())
+
+    def resize(self, max_entries=_UNCHANGED, max_frames=_UNCHANGED):
+        """Change the size bounds, evicting entries if needed. A bound that is not given
+        keeps its current value; max_frames=None removes the frame bound."""
+        with self._lock:
+            if max_entries is not _UNCHANGED:
+                self.max_entries = max_entries
+            if max_frames is not _UNCHANGED:
+                self.max_frames = max_frames
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            for sequence in self._entries.values():
+                sequence.close()
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+# process-wide cache used by load_sequence
+sequence_cache = SequenceCache()
+
+def load_sequence(file_name, robot_config):
+    """Returns a Sequence for file_name from the process-wide sequence cache, loading it if needed."""
+    return sequence_cache.get(file_name, robot_config)
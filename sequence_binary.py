@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Packed binary sequence format (.bseq), and converters to and from the JSON sequence format.
+
+Layout, all little-endian:
+    header      magic b"BSEQ", uint16 version, uint16 model type (0 = any), uint16 motor count,
+                uint16 reserved, uint32 frame count
+    names       uint16 length + UTF-8 bytes for the animation name, then for each motor name
+    padding     zero bytes up to a multiple of 4
+    millis      int32[frames]
+    positions   int32[frames * motors], hundredths of a degree, row per frame
+    durations   uint16[frames * motors], milliseconds, row per frame
+
+Usage:
+    python sequence_binary.py to-binary Sequences/sadness.json Sequences/sadness.bseq --model 1230
+    python sequence_binary.py to-json Sequences/sadness.bseq Sequences/sadness.json
+"""
+
+import sys
+import json
+import mmap
+import array
+import struct
+import argparse
+
+from log_conf import logger
+
+BINARY_MAGIC = b"BSEQ"
+BINARY_VERSION = 1
+BINARY_EXTENSION = ".bseq"
+# positions are stored as integers in 1/POSITION_SCALE degrees
+POSITION_SCALE = 100
+
+_HEADER = struct.Struct("<4sHHHHI")
+
+def _pack_string(text):
+    data = text.encode("utf-8")
+    return struct.pack("<H", len(data)) + data
+
+def write_binary_sequence(file_path, name, motors, frame_times, frame_positions, frame_durations, model_type=0):
+    """Write a sequence to file_path in the packed binary format. Positions are in degrees."""
+    num_frames = len(frame_times)
+    num_motors = len(motors)
+
+    header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, model_type, num_motors, 0, num_frames)
+    header += _pack_string(name) + b"".join(_pack_string(motor) for motor in motors)
+    header += b"\0" * (-len(header) % 4)
+
+    # times and durations are whole milliseconds; round rather than truncate so frames are not shifted early
+    millis = array.array("i", (int(round(t)) for t in frame_times))
+    positions = array.array("i", (int(round(pos * POSITION_SCALE)) for row in frame_positions for pos in row))
+    durations = array.array("H")
+    for row in frame_durations:
+        for duration in row:
+            duration = int(round(duration))
+            if not 0 <= duration <= 0xFFFF:
+                raise ValueError(f"Duration {duration} ms does not fit the binary format (0 to 65535)")
+            durations.append(duration)
+    if len(positions) != num_frames * num_motors or len(durations) != num_frames * num_motors:
+        raise ValueError("Every frame must have a position and a duration for every motor")
+
+    if sys.byteorder != "little":
+        for values in (millis, positions, durations):
+            values.byteswap()
+
+    with open(file_path, "wb") as f:
+        f.write(header)
+        f.write(millis.tobytes())
+        f.write(positions.tobytes())
+        f.write(durations.tobytes())
+
+class FrameRows:
+    """
+    Read-only list-like view of one array of a binary sequence: row i is frame i's values for the selected columns.
+    Values are read from the underlying buffer on access and divided by scale.
+    """
+    def __init__(self, values, num_columns, columns, scale=1):
+        self._values = values
+        self._num_columns = num_columns
+        self._columns = columns
+        self._scale = scale
+
+    def __len__(self):
+        return len(self._values) // self._num_columns
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("frame index out of range")
+        base = index * self._num_columns
+        if self._scale == 1:
+            return [self._values[base + j] for j in self._columns]
+        return [self._values[base + j] / self._scale for j in self._columns]
+
+class BinarySequenceFile:
+    """
+    A memory-mapped binary sequence. millis, positions and durations are views straight into the file,
+    nothing is parsed beyond the header. close() (or leaving a with block) releases the views and
+    unmaps the file.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.model_type, self.num_motors, _, self.num_frames = _HEADER.unpack_from(self._map, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{file_path} is not a binary sequence file")
+        if version != BINARY_VERSION:
+            raise ValueError(f"{file_path} has unsupported binary sequence version {version}")
+
+        offset = _HEADER.size
+        self.name, offset = self._read_string(offset)
+        self.motors = []
+        for _ in range(self.num_motors):
+            motor, offset = self._read_string(offset)
+            self.motors.append(motor)
+        offset += -offset % 4
+
+        cells = self.num_frames * self.num_motors
+        self.millis, offset = self._view(offset, "i", self.num_frames)
+        self.positions, offset = self._view(offset, "i", cells)
+        self.durations, offset = self._view(offset, "H", cells)
+
+    def close(self):
+        """Release the views and unmap the file. The frames cannot be read afterwards."""
+        if self._map is None:
+            return
+        for values in (self.millis, self.positions, self.durations):
+            if isinstance(values, memoryview):
+                values.release()
+        self._map.close()
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read_string(self, offset):
+        (length,) = struct.unpack_from("<H", self._map, offset)
+        start = offset + 2
+        return bytes(self._map[start:start + length]).decode("utf-8"), start + length
+
+    def _view(self, offset, fmt, count):
+        size = array.array(fmt).itemsize * count
+        if offset + size > len(self._map):
+            raise ValueError(f"{self.file_path} is truncated")
+        if sys.byteorder == "little":
+            values = memoryview(self._map)[offset:offset + size].cast(fmt)
+        else:
+            # the file is little-endian, so big-endian hosts need a swapped copy
+            values = array.array(fmt, self._map[offset:offset + size])
+            values.byteswap()
+        return values, offset + size
+
+def json_to_binary(json_path, binary_path, model_type=0):
+    """Convert a JSON sequence file to the binary format."""
+    with open(json_path, "r") as f:
+        seq_dict = json.load(f)
+    frames = seq_dict["frame_list"]
+    motors = [position["dof"] for position in frames[0]["positions"]] if frames else []
+    write_binary_sequence(binary_path, seq_dict["animation"], motors,
+                          [frame["millis"] for frame in frames],
+                          [[position["pos"] for position in frame["positions"]] for frame in frames],
+                          [[position["duration"] for position in frame["positions"]] for frame in frames],
+                          model_type=model_type)
+    logger.info("Wrote %d frames of %s to %s", len(frames), seq_dict["animation"], binary_path)
+
+def binary_to_json(binary_path, json_path):
+    """Convert a binary sequence file back to the JSON format."""
+    with BinarySequenceFile(binary_path) as seq:
+        columns = range(seq.num_motors)
+        positions = FrameRows(seq.positions, seq.num_motors, columns, POSITION_SCALE)
+        durations = FrameRows(seq.durations, seq.num_motors, columns)
+        frame_list = []
+        for i in range(seq.num_frames):
+            frame_list.append({
+                "millis": seq.millis[i],
+                "positions": [{"dof": motor, "pos": int(pos) if pos == int(pos) else pos, "duration": duration}
+                              for motor, pos, duration in zip(seq.motors, positions[i], durations[i])],
+            })
+    with open(json_path, "w") as f:
+        json.dump({"animation": seq.name, "frame_list": frame_list}, f, indent=4)
+    logger.info("Wrote %d frames of %s to %s", seq.num_frames, seq.name, json_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert sequences between the JSON and binary formats.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    to_binary = subparsers.add_parser("to-binary", help="JSON sequence to binary")
+    to_binary.add_argument("source")
+    to_binary.add_argument("destination")
+    to_binary.add_argument("--model", type=int, default=0, help="motor type the sequence is for (350, 1200, 1230), 0 for any")
+    to_json = subparsers.add_parser("to-json", help="binary sequence to JSON")
+    to_json.add_argument("source")
+    to_json.add_argument("destination")
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        json_to_binary(args.source, args.destination, model_type=args.model)
+    else:
+        binary_to_json(args.source, args.destination)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import copy
+import json
+import queue
+import threading
+
+import jsonschema
+
+from log_conf import logger
+
+from sequence import *
+
+# Characters read from the file at a time
+STREAM_CHUNK_SIZE = 65536
+
+# How often a producer waiting for room in the buffer checks whether playback has stopped, in seconds
+STREAM_PUT_POLL_S = 0.05
+
+_WHITESPACE = " \t\n\r"
+
+class _JsonStream:
+    """Reads JSON values one at a time from a text file, refilling a buffer as needed."""
+    def __init__(self, json_file, chunk_size=STREAM_CHUNK_SIZE):
+        self._file = json_file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Read one more chunk, dropping what has been consumed. Returns False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Next character that is not whitespace, without consuming it ("" at end of file)."""
+        while 1:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while 1:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # probably cut off at the end of the buffer, read more and try again
+                if not self._fill():
+                    raise
+                continue
+            # a number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and not isinstance(value, (dict, list, str)) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+def iter_sequence_frames(json_file, header):
+    '''
+    Yields the frames of a sequence file's "frame_list" one at a time without loading the whole file.
+    Every other top level key is stored in header as it is read.
+    '''
+    stream = _JsonStream(json_file)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while 1:
+        key = stream.value()
+        stream.expect(":")
+        if key == "frame_list":
+            stream.expect("[")
+            if stream.peek() != "]":
+                while 1:
+                    yield stream.value()
+                    if stream.peek() != ",":
+                        break
+                    stream.expect(",")
+            stream.expect("]")
+        else:
+            header[key] = stream.value()
+        if stream.peek() != ",":
+            break
+        stream.expect(",")
+    stream.expect("}")
+
+def split_schema(schema):
+    """Split the sequence schema into a schema for everything but frame_list, and a schema for one frame."""
+    header_schema = copy.deepcopy(schema)
+    header_schema.get("properties", {}).pop("frame_list", None)
+    if "frame_list" in header_schema.get("required", []):
+        header_schema["required"] = [key for key in header_schema["required"] if key != "frame_list"]
+
+    # keep the root keywords that $refs in the frame schema may point to
+    frame_schema = {key: schema[key] for key in ("$schema", "definitions", "$defs") if key in schema}
+    frame_schema.update(schema.get("properties", {}).get("frame_list", {}).get("items", {}))
+    return header_schema, frame_schema
+
+class StreamingSequence(Sequence):
+    '''
+    A Sequence that is parsed, validated and interpreted frame by frame while it plays.
+
+    When playback starts, a background thread reads frames from the file into a bounded buffer of
+    buffer_frames frames, so the first frame can be sent as soon as it is read, whatever the length
+    of the file. If playback stops early, the thread stops and the file is closed.
+    Each frame is validated against the schema's frame_list items; the other top level keys are
+    validated once the whole file has been read. A stream can only be played once.
+    '''
+    def __init__(self, file_name, robot_config, buffer_frames=64):
+        self.file_name = file_name
+        self.available_motors = set(robot_config["motors"].keys())
+        self.name = None
+        self.motors_used = None
+        self.num_frames = 0
+
+        self.compiled_frames = None
+        self.compiled_robot = None
+        self.lateness_ms = []
+        self.timing_stats = None
+
+        schema, _ = get_schema_validator()
+        header_schema, frame_schema = split_schema(schema)
+        self._header_validator = jsonschema.validators.validator_for(header_schema)(header_schema)
+        self._frame_validator = jsonschema.validators.validator_for(frame_schema)(frame_schema)
+
+        self._buffer = queue.Queue(maxsize=buffer_frames)
+        self._stop = threading.Event()
+        self._producer = None
+
+    def _put(self, item):
+        """Put item in the buffer, waiting for room. Returns False if playback stopped first."""
+        while not self._stop.is_set():
+            try:
+                self._buffer.put(item, timeout=STREAM_PUT_POLL_S)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        """Read, validate and interpret frames into the buffer. Ends with None, or the exception that stopped it."""
+        header = {}
+        valid_indices = None
+        try:
+            with open(self.file_name, "r") as json_file:
+                for i, frame in enumerate(iter_sequence_frames(json_file, header)):
+                    self._frame_validator.validate(frame)
+                    if valid_indices is None:
+                        # motors used come from the first frame, dropping any the robot does not have
+                        motors_used = [position["dof"] for position in frame["positions"]]
+                        valid_indices = [j for j, motor in enumerate(motors_used) if motor in self.available_motors]
+                        self.motors_used = [motors_used[j] for j in valid_indices]
+                    if self.name is None and "animation" in header:
+                        self.name = header["animation"]
+                    positions = [frame["positions"][j]["pos"] for j in valid_indices]
+                    durations = [frame["positions"][j]["duration"] for j in valid_indices]
+                    if not self._put((i, frame["millis"], positions, durations)):
+                        return
+            self._header_validator.validate(header)
+            self.name = header.get("animation", self.name)
+            self._put(None)
+        except Exception as e:
+            self._put(e)
+
+    def _frames(self):
+        """Starts the producer thread and yields frames as it makes them available, one frame behind so
+        the last frame is known. Stops the producer, closing the file, when iteration ends for any reason."""
+        if self._producer is not None:
+            msg = f"Streaming sequence {self.file_name} can only be played once"
+            logger.critical(msg)
+            raise RuntimeError(msg)
+        self._producer = threading.Thread(target=self._produce, name=f"sequence-stream {self.file_name}", daemon=True)
+        self._producer.start()
+
+        pending = None
+        try:
+            while 1:
+                item = self._buffer.get()
+                if isinstance(item, Exception):
+                    if isinstance(item, jsonschema.exceptions.ValidationError):
+                        logger.critical("JSON validation error: %s", item.message)
+                    else:
+                        logger.critical("Error while streaming sequence %s: %s", self.file_name, item)
+                    raise item
+                if pending is not None:
+                    yield pending + (item is None,)
+                if item is None:
+                    return
+                pending = item
+                self.num_frames += 1
+        finally:
+            self._stop.set()
+            self._producer.join()
+
+    def compile(self, robot):
+        """Streamed frames are not known ahead of time, so they cannot be compiled."""
+        logger.warning("Streaming sequences cannot be compiled, frames will be sent with move_motors_sync")
+        return 0
+
+    def to_string(self):
+        logger.info("Name: %s", self.name)
+        logger.info("File: %s", self.file_name)
+        logger.info("Motors: %s", self.motors_used)
+        logger.info("Frames read so far: %d", self.num_frames)
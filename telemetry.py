@@ -0,0 +1,214 @@
+import time
+import threading
+
+import numpy as np
+from dynamixel_sdk import GroupSyncRead
+
+from log_conf import logger
+
+from ring_buffer import RingBuffer
+
+# Present-state register block read by the sampler, per motor type: (start address, length, fields).
+# Each field is (name, address, dtype, direction bit). XL-320 speed and load are a 10 bit magnitude
+# with a direction bit, decoded to a signed value (negative is clockwise).
+TELEMETRY_BLOCKS = {
+    350: (37, 14, (
+        ("position", 37, "<u2", None),
+        ("velocity", 39, "<u2", 10),
+        ("load", 41, "<u2", 10),
+        ("voltage", 45, "<u1", None),
+        ("temperature", 46, "<u1", None),
+        ("moving", 49, "<u1", None),
+        ("hardware_error", 50, "<u1", None),
+    )),
+    1200: (122, 25, (
+        ("moving", 122, "<u1", None),
+        ("moving_status", 123, "<u1", None),
+        ("pwm", 124, "<i2", None),
+        ("current", 126, "<i2", None),
+        ("velocity", 128, "<i4", None),
+        ("position", 132, "<i4", None),
+        ("voltage", 144, "<u2", None),
+        ("temperature", 146, "<u1", None),
+    )),
+}
+TELEMETRY_BLOCKS[1230] = TELEMETRY_BLOCKS[1200]
+
+# Share of the bus the sampler may use, leaving the rest to motion
+DEFAULT_TELEMETRY_UTILIZATION = 0.1
+
+def sync_read_bytes(num_motors, length):
+    """Bytes on the bus for one Protocol 2 sync read of length bytes from num_motors motors (instruction and status packets)."""
+    return (14 + num_motors) + num_motors * (11 + length)
+
+class TelemetrySampler:
+    '''
+    Samples the present-state block of every motor (position, velocity, load or current, voltage,
+    temperature, ...) with one group sync read, at rate_hz, from a background thread.
+
+    Samples go into a RingBuffer of the last capacity samples, each row holding the timestamp,
+    a motors x fields array of values and a per-motor valid flag. With spill_path set, the
+    samples are also written to disk in chunks (see ring_buffer.py). The reads run at the lowest bus
+    priority, and rate_hz is capped so telemetry uses at most bus_utilization of the bus.
+    Periods missed because the bus was busy are skipped, not made up.
+    latest() and history() never touch the bus.
+    '''
+    def __init__(self, robot, rate_hz=20.0, capacity=1200, motor_ids=None, bus_utilization=DEFAULT_TELEMETRY_UTILIZATION,
+                 spill_path=None, chunk_size=None):
+        if robot.protocol != 2:
+            msg = "Telemetry sampling needs Protocol 2 sync reads"
+            logger.critical(msg)
+            raise RuntimeError(msg)
+        self.robot = robot
+        self.start_address, self.length, self.fields = TELEMETRY_BLOCKS[robot.model_type]
+        self.field_names = [field[0] for field in self.fields]
+
+        if motor_ids is None:
+            motor_ids = robot.dxl_ids
+        self.motor_ids = []
+        for key in motor_ids:
+            motor_id = robot._resolve_motor_key(key)
+            if motor_id is None:
+                msg = f"{key} not a valid motor name/id."
+                logger.critical(msg)
+                raise RuntimeError(msg)
+            self.motor_ids.append(motor_id)
+        self._slots = robot.motors.resolve(self.motor_ids)
+
+        self.reader = GroupSyncRead(robot.port_handler, robot.packet_handler, self.start_address, self.length)
+        for motor_id in self.motor_ids:
+            if not self.reader.addParam(motor_id):
+                msg = f"[ID:{motor_id}] telemetry reader addParam failed"
+                logger.critical(msg)
+                raise RuntimeError(msg)
+
+        cap = bus_utilization * robot.baud_rate / (10 * sync_read_bytes(len(self.motor_ids), self.length))
+        if rate_hz > cap:
+            logger.warning("Capping telemetry rate from %.1f Hz to %.1f Hz for %d motors at %d baud",
+                           rate_hz, cap, len(self.motor_ids), robot.baud_rate)
+            rate_hz = cap
+        self.rate_hz = rate_hz
+
+        shape = (len(self.motor_ids), len(self.fields))
+        self.buffer = RingBuffer(capacity, dtype=[("timestamp_ns", np.int64), ("values", np.int32, shape),
+                                                  ("valid", bool, shape[:1])],
+                                 spill_path=spill_path, chunk_size=chunk_size)
+        self._values = np.zeros(shape, dtype=np.int32)
+        self.missed = 0
+        self.failed_reads = 0
+        self._lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+        logger.info("Telemetry sampling %d motors at %.1f Hz", len(self.motor_ids), self.rate_hz)
+
+    def stop(self):
+        """Stop the background thread and spill the samples not on disk yet. The samples already taken stay available."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        with self._lock:
+            self.buffer.flush()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        period_ns = int(1e9 / self.rate_hz)
+        deadline = time.perf_counter_ns()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("Telemetry sample failed")
+                self.failed_reads += 1
+
+            deadline += period_ns
+            now = time.perf_counter_ns()
+            if now > deadline:
+                # skip the periods the read overran instead of bursting to catch up
+                skipped = (now - deadline) // period_ns + 1
+                self.missed += skipped
+                deadline += skipped * period_ns
+            self._stop.wait((deadline - now) / 1e9)
+
+    def sample(self):
+        """Take one sample now. Returns True if every motor answered."""
+        raw = self.robot._read_block(self.reader, self.start_address, self.length)
+        timestamp = time.perf_counter_ns()
+
+        valid = np.array([motor_id in raw for motor_id in self.motor_ids], dtype=bool)
+        if not valid.any():
+            self.failed_reads += 1
+            return False
+        data = np.frombuffer(b"".join(raw[motor_id] for motor_id in self.motor_ids if motor_id in raw),
+                             dtype=np.uint8).reshape(-1, self.length)
+
+        # motors that did not answer keep their previous values, marked invalid
+        values = self._values
+        for column, (name, address, dtype, direction_bit) in enumerate(self.fields):
+            offset = address - self.start_address
+            size = np.dtype(dtype).itemsize
+            field = np.ascontiguousarray(data[:, offset:offset + size]).view(dtype).ravel().astype(np.int32)
+            if direction_bit is not None:
+                magnitude = field & ((1 << direction_bit) - 1)
+                field = np.where(field & (1 << direction_bit), -magnitude, magnitude)
+            values[valid, column] = field
+        with self._lock:
+            self.buffer.append((timestamp, values, valid))
+
+        # keep the robot's last known positions and velocities current
+        motors = self.robot.motors
+        slots = self._slots[valid]
+        motors.position[slots] = values[valid, self.field_names.index("position")]
+        motors.velocity[slots] = values[valid, self.field_names.index("velocity")]
+
+        if not valid.all():
+            self.failed_reads += 1
+            return False
+        return True
+
+    @property
+    def count(self):
+        """Number of samples taken."""
+        return self.buffer.count
+
+    def latest(self):
+        '''
+        The most recent sample without touching the bus, or None if nothing has been sampled yet.
+        Returns {"timestamp_ns": perf_counter_ns of the sample, motor id: {field: value, ..., "valid": bool}}.
+        '''
+        with self._lock:
+            row = self.buffer.last()
+            if row is None:
+                return None
+            values = row["values"].tolist()
+            valid = row["valid"].tolist()
+            timestamp = int(row["timestamp_ns"])
+        snapshot = {"timestamp_ns": timestamp}
+        for motor_id, motor_values, motor_valid in zip(self.motor_ids, values, valid):
+            snapshot[motor_id] = dict(zip(self.field_names, motor_values), valid=motor_valid)
+        return snapshot
+
+    def history(self, n=None):
+        '''
+        Copies of the last n samples (all buffered samples by default), oldest first:
+        (timestamps in perf_counter_ns, values array of samples x motors x fields, valid array of samples x motors).
+        Field columns follow field_names, motor rows follow motor_ids.
+        '''
+        with self._lock:
+            rows = self.buffer.latest(n).copy()
+        return rows["timestamp_ns"], rows["values"], rows["valid"]
+
+    def stats(self):
+        """Samples taken, periods missed and failed reads so far."""
+        return {"rate_hz": self.rate_hz, "samples": self.count, "missed": self.missed, "failed_reads": self.failed_reads}
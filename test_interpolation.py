@@ -0,0 +1,65 @@
+import log_conf
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from robot import Robot
+from config import ROBOT_330_VIRTUAL
+from frame_clock import FrameClock, LATE_FRAME_MS
+from interpolation import interpolate, ResampledSequence, INTERPOLATION_METHODS
+
+# Keyframes whose moves are overtaken by the next keyframe, so two of them are reached at the same time.
+# Runs on the simulated bus in virtual_bus.py, no motors needed
+overlapping = SimpleNamespace(name="overlapping", seq_dict={}, motors_used=["base", "tower_1"],
+                              frame_times=[0, 200, 400, 1000],
+                              frame_positions=[[0, 0], [30, 10], [-20, 5], [10, 0]],
+                              frame_durations=[[500, 500], [100, 100], [100, 100], [500, 500]])
+
+def test_equal_times():
+    times = [0.0, 500.0, 500.0, 900.0]
+    positions = [[0.0], [30.0], [-20.0], [10.0]]
+    for method in INTERPOLATION_METHODS:
+        result = interpolate(times, positions, np.linspace(0, 900, 91), method)
+        assert np.isfinite(result).all(), method
+        assert result[50, 0] == -20.0 and result[-1, 0] == 10.0, method
+
+def test_overlapping_durations():
+    robot = Robot(config_dict=ROBOT_330_VIRTUAL)
+    for method in INTERPOLATION_METHODS:
+        resampled = ResampledSequence(overlapping, robot, rate_hz=50, method=method)
+        positions = np.array(resampled.frame_positions)
+        assert np.isfinite(positions).all(), method
+        assert np.abs(positions).max() <= 30.0 + 1e-9, method
+        assert resampled.compiled_frames is not None and len(resampled.compiled_frames) == resampled.num_frames - 1
+    robot.clean_shutdown()
+
+def test_rate_above_move_floor():
+    robot = Robot(config_dict=ROBOT_330_VIRTUAL)
+    resampled = ResampledSequence(overlapping, robot, rate_hz=100, method="linear")
+    assert resampled.rate_hz == 100
+    assert all(duration == 10.0 for durations in resampled.frame_durations[1:] for duration in durations)
+    robot.clean_shutdown()
+
+def test_playback_on_schedule():
+    # 4 s of keyframes at 50 Hz on a blocking robot: frames must not wait for the motors
+    robot = Robot(config_dict=ROBOT_330_VIRTUAL)
+    assert robot.blocking
+    keyframes = SimpleNamespace(name="long", seq_dict={}, motors_used=["base", "tower_1"],
+                                frame_times=[0, 1000, 2000, 3000],
+                                frame_positions=[[0, 0], [30, 10], [-20, 5], [10, 0]],
+                                frame_durations=[[100, 100], [1000, 1000], [1000, 1000], [1000, 1000]])
+    resampled = ResampledSequence(keyframes, robot, rate_hz=50, method="min_jerk")
+    resampled.play_sequence(robot=robot, clock=FrameClock(spin_ms=0.5))
+    stats = resampled.timing_stats
+    assert stats["frames"] == resampled.num_frames
+    assert stats["mean_ms"] < LATE_FRAME_MS, stats
+    assert stats["max_ms"] < 1000.0 / resampled.rate_hz, stats
+    robot.clean_shutdown()
+
+if __name__ == "__main__":
+    test_equal_times()
+    test_overlapping_durations()
+    test_rate_above_move_floor()
+    test_playback_on_schedule()
+    print("Interpolation OK")
@@ -0,0 +1,28 @@
+import log_conf
+
+import numpy as np
+
+from robot import Robot
+from config import ROBOT_330_VIRTUAL
+
+# Recording readings outside the position range, as when the arm is backdriven with torque off.
+# Runs on the simulated bus in virtual_bus.py, no motors needed
+def test_out_of_range_positions():
+    robot = Robot(config_dict=ROBOT_330_VIRTUAL)
+    for motor_id, position in ((1, -100), (2, 4500)):
+        motor = robot.port_handler.motors[motor_id]
+        motor._goal_pos = position
+        motor._move_time = 0.0
+
+    samples, stats = robot.record(["tower_1", "tower_2"], duration=0.05, rate_hz=100)
+    assert stats["samples"] > 0 and stats["failed_reads"] == 0
+    assert np.isfinite(samples["tower_1"]).all() and np.isfinite(samples["tower_2"]).all()
+    assert samples["tower_2"].max() <= 180.0
+
+    raw, _ = robot.record(["tower_2"], duration=0.05, rate_hz=100, degrees=False)
+    assert (raw["tower_2"] == 4500).all()
+    robot.clean_shutdown()
+
+if __name__ == "__main__":
+    test_out_of_range_positions()
+    print("Out of range recording OK")
@@ -0,0 +1,50 @@
+import log_conf
+
+import os
+import json
+import tempfile
+
+from sequence_binary import *
+
+# Round trip of a JSON sequence with fractional millis and durations through the binary format, no motors needed
+frames = [
+    {"millis": 0, "positions": [{"dof": "tower_1", "pos": 10, "duration": 250.4}, {"dof": "tower_2", "pos": -12.5, "duration": 100}]},
+    {"millis": 499.6, "positions": [{"dof": "tower_1", "pos": 20.25, "duration": 300.5}, {"dof": "tower_2", "pos": 0, "duration": 99.7}]},
+    {"millis": 999.9, "positions": [{"dof": "tower_1", "pos": 0, "duration": 0.2}, {"dof": "tower_2", "pos": 5, "duration": 65535}]},
+]
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "fractional.json")
+        binary = os.path.join(tmp, "fractional.bseq")
+        result = os.path.join(tmp, "result.json")
+        with open(source, "w") as f:
+            json.dump({"animation": "fractional", "frame_list": frames}, f)
+
+        json_to_binary(source, binary)
+        binary_to_json(binary, result)
+        with open(result, "r") as f:
+            round_trip = json.load(f)["frame_list"]
+
+    assert [frame["millis"] for frame in round_trip] == [0, 500, 1000]
+    assert [[p["duration"] for p in frame["positions"]] for frame in round_trip] == [[250, 100], [300, 100], [0, 65535]]
+    assert [[p["pos"] for p in frame["positions"]] for frame in round_trip] == [[10, -12.5], [20.25, 0], [0, 5]]
+
+def test_close():
+    with tempfile.TemporaryDirectory() as tmp:
+        binary = os.path.join(tmp, "fractional.bseq")
+        write_binary_sequence(binary, "fractional", ["tower_1", "tower_2"], [0, 500], [[10, -12.5], [20.25, 0]], [[250, 100], [300, 100]])
+        with BinarySequenceFile(binary) as seq:
+            assert list(seq.millis) == [0, 500]
+        try:
+            seq.millis[0]
+            assert False, "views must be released on close"
+        except ValueError:
+            pass
+        seq.close()
+        os.remove(binary)
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_close()
+    print("Binary sequence round trip OK")
@@ -0,0 +1,28 @@
+import log_conf
+
+from robot import *
+from config import ROBOT_330_VIRTUAL
+
+import time
+
+# Runs on the simulated bus in virtual_bus.py, no motors needed
+my_robot = Robot(config_dict=ROBOT_330_VIRTUAL)
+my_robot.enable_torque()
+
+print("Current positions")
+my_robot.check_motor_status(["all"])
+
+my_robot.port_handler.reset_stats()
+start = time.perf_counter()
+my_robot.move_motors_sync(args={1:30, 2:30, 3:30, 4:0, 5:90, 6:150}, duration={1:500, 2:500, 3:500, 4:500, 5:500, 6:500})
+print("\nResult of move (%.1f ms, bus stats %s)" % ((time.perf_counter() - start) * 1000, my_robot.port_handler.stats))
+my_robot.check_motor_status(["all"])
+
+move = my_robot.move_motors_sync_async(args={1:-30, 2:-30, 3:-30}, duration={1:300, 2:300, 3:300})
+print("\nNon-blocking move done: %s" % move.wait(timeout=2))
+my_robot.check_motor_status(["all"])
+
+my_robot.reset()
+my_robot.check_motor_status(["all"])
+
+my_robot.clean_shutdown()
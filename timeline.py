@@ -0,0 +1,113 @@
+import heapq
+
+from log_conf import logger
+
+from frame_clock import FrameClock
+
+class Track:
+    """
+    One layer of a choreography: a list of (timestamp ms, args, duration, velocity) events,
+    sorted by timestamp, and the priority its events have over other tracks' for the same motor.
+    """
+    def __init__(self, events, priority=0, name=None):
+        self.events = events
+        self.priority = priority
+        self.name = name
+
+    def __iter__(self):
+        return iter(self.events)
+
+class Timeline:
+    '''
+    Plays several tracks together.
+
+    Tracks are merged lazily with a heap, in timestamp order. All events due within window_ms of the
+    first pending event are coalesced into one move, so tracks that touch different motors at the same
+    time share one sync write packet. When several events in a batch move the same motor, the event from
+    the track with the highest priority wins; between equal priorities the later event wins.
+    '''
+    def __init__(self, tracks, window_ms=5.0):
+        self.tracks = [track if isinstance(track, Track) else Track(track) for track in tracks]
+        self.window_ms = window_ms
+        self.events_played = 0
+        self.batches_played = 0
+        self.conflicts = 0
+
+    def _track_events(self, index, track):
+        previous = None
+        for seq, event in enumerate(track):
+            if previous is not None and event[0] < previous:
+                msg = f"Events of track {track.name or index} are not in timestamp order"
+                logger.error(msg)
+                raise ValueError(msg)
+            previous = event[0]
+            # seq keeps the heap from ever comparing two events' dictionaries
+            yield (event[0], index, seq, track.priority, event)
+
+    def events(self):
+        """Yields (timestamp, track index, position in track, priority, event) for every event of every track, in timestamp order."""
+        return heapq.merge(*(self._track_events(i, track) for i, track in enumerate(self.tracks)))
+
+    def batches(self):
+        """Yields (timestamp, list of merged events) with every event due within window_ms of the first."""
+        events = self.events()
+        batch = []
+        for item in events:
+            if batch and item[0] > batch[0][0] + self.window_ms:
+                yield batch[0][0], batch
+                batch = []
+            batch.append(item)
+        if batch:
+            yield batch[0][0], batch
+
+    def resolve(self, robot, batch):
+        '''
+        Combine a batch of events into one move.
+        Returns the args, duration and velocity dictionaries keyed by motor id (duration or velocity may be None).
+        '''
+        # motor id -> (priority, order, position, duration, velocity)
+        winners = {}
+        for order, (_, _, _, priority, (_, args, duration, velocity)) in enumerate(batch):
+            for key, position in args.items():
+                motor_id = robot._resolve_motor_key(key)
+                if motor_id is None:
+                    logger.error("%s not a valid motor name/id.", key)
+                    continue
+                if motor_id in winners:
+                    self.conflicts += 1
+                    if winners[motor_id][0] > priority:
+                        continue
+                winners[motor_id] = (priority, order, position,
+                                     duration.get(key) if duration else None,
+                                     velocity.get(key) if velocity else None)
+
+        args = {motor_id: winner[2] for motor_id, winner in winners.items()}
+        durations = {motor_id: winner[3] for motor_id, winner in winners.items() if winner[3] is not None}
+        velocities = {motor_id: winner[4] for motor_id, winner in winners.items() if winner[4] is not None}
+        return args, durations or None, velocities or None
+
+    def play(self, robot, clock=None, degrees=True):
+        """
+        Play the timeline on robot, one sync write per batch, scheduled by clock (a FrameClock,
+        catch_up policy by default). Moves are sent without waiting for them.
+        Returns the clock, whose stats() describe how late the batches were.
+        """
+        if clock is None:
+            clock = FrameClock()
+        self.events_played = 0
+        self.batches_played = 0
+        self.conflicts = 0
+
+        clock.start()
+        for i, (timestamp, batch) in enumerate(self.batches()):
+            if not clock.wait_for(i, timestamp):
+                continue
+            args, duration, velocity = self.resolve(robot, batch)
+            if args:
+                robot.send_move_sync(args, duration=duration, degrees=degrees, velocity=velocity)
+            self.events_played += len(batch)
+            self.batches_played += 1
+
+        logger.info("Timeline played %d events in %d moves (%d motor conflicts resolved)",
+                    self.events_played, self.batches_played, self.conflicts)
+        return clock
@@ -1,5 +1,7 @@
 from robot import *
 from config import *
+from robot_pool import get_robot
+from timeline import Timeline, Track
 import time
 # import Touch2Gesture as tg
 
@@ -10,27 +12,17 @@ from flask import Flask, request, jsonify
 
 app = Flask(__name__)
 
-def run_parallel_sequences(sequences):
-    my_robot.blocking = False
-    timeline = []
-    for seq in sequences:
-        timeline.extend(seq)
-    timeline.sort(key=lambda x: x[0])  # sort by timestamp
-
-    start_time = time.time()
-
-    for i, (timestamp, args, duration, velocity) in enumerate(timeline):
-        now = time.time()
-        target_time = start_time + timestamp / 1000.0
-        sleep_time = target_time - now
-        if sleep_time > 0:
-            time.sleep(sleep_time)
-
-        # Move using all available fields
-        my_robot.move_motors_sync(args=args, duration=duration, velocity=velocity)
+def run_parallel_sequences(sequences, priorities=None, window_ms=5.0):
+    """Play several (timestamp, args, duration, velocity) tracks together. Events due within 
+    window_ms share one sync write; if tracks move the same motor at once, the higher priority wins."""
+    my_robot = get_robot(ROBOT_330_LAB)
+    if priorities is None:
+        priorities = [0] * len(sequences)
+    timeline = Timeline([Track(seq, priority=p) for seq, p in zip(sequences, priorities)], window_ms=window_ms)
+    timeline.play(my_robot)
 
 def runTest():
-    my_robot = Robot(config_dict=ROBOT_330_LAB)
+    my_robot = get_robot(ROBOT_330_LAB)
     my_robot.set_speed(2,2)
     logger.info("Starting positions")
     my_robot.check_motor_status(["all"])
@@ -58,13 +50,12 @@ def runTest():
    
     my_robot.check_motor_status(["all"])
     logger.info("Sleep 2")
-    my_robot.clean_shutdown()
     logger.info("Ended")
 
     
 
 def runCalming():
-    my_robot = Robot(config_dict=ROBOT_330_LAB)
+    my_robot = get_robot(ROBOT_330_LAB)
     my_robot.set_speed(20,200)
     logger.info("Starting positions")
     my_robot.check_motor_status(["all"])
@@ -88,7 +79,7 @@ def runCalming():
 
 def runSadness():
 
-    my_robot = Robot(config_dict=ROBOT_330_LAB)
+    my_robot = get_robot(ROBOT_330_LAB)
     my_robot.set_speed(2,20)
     logger.info("Starting positions")
     my_robot.check_motor_status(["all"])
@@ -128,14 +119,13 @@ def runSadness():
     #time.sleep(2)
     my_robot.check_motor_status(["all"])
 
-    my_robot.clean_shutdown()
     logger.info("Ended")
 
 
 
 def run_happiness():
 
-    my_robot = Robot(config_dict=ROBOT_330_LAB)
+    my_robot = get_robot(ROBOT_330_LAB)
     my_robot.check_motor_status(["all"])
     my_robot.enable_torque()
 
@@ -272,7 +262,7 @@ def run_sadness2():
 
 
 def run_angry():
-    my_robot = Robot(config_dict=ROBOT_330_LAB)
+    my_robot = get_robot(ROBOT_330_LAB)
     my_robot.set_speed(2, 5)
     logger.info("Starting positions")
     my_robot.check_motor_status(["all"])
@@ -306,7 +296,6 @@ def run_angry():
     my_robot.check_motor_status(["all"])
     time.sleep(1)
 
-    my_robot.clean_shutdown()
     logger.info("Sadness gesture ended")
 
 def run_attention():
@@ -552,7 +541,7 @@ def run_function():
     return jsonify({"status": "success", "executed": func_name})
 
 if __name__ == "__main__":
-    my_robot = Robot(config_dict=ROBOT_330_LAB)
+    my_robot = get_robot(ROBOT_330_LAB)
     my_robot.enable_torque()
     app.run(host="0.0.0.0", port=5002)
     #run_attention()
\ No newline at end of file
@@ -0,0 +1,473 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+In-process stand-in for a Dynamixel bus, for running Robot and Sequence without hardware.
+
+VirtualPortHandler has the same interface as dynamixel_sdk's PortHandler, so the SDK's
+PacketHandler and GroupSync/Bulk objects work on it unchanged. Written instruction packets
+(Protocol 1 or 2) are parsed and answered by VirtualMotors that keep a control table laid
+out like CT_XL320_ADDR / CT_XL330_ADDR / CT_XC330_ADDR.
+
+Timing model:
+- transmit time of every byte at the configured baud rate (10 bits per byte)
+- each motor's Return Delay Time register (2 us per unit) before its status packet
+- a fixed USB round trip latency per status packet
+- motion that follows the motor's profile (time-based or velocity-based on the 330s,
+  Moving Speed on the 320), so Moving and Present Position change over real time
+"""
+
+import time
+
+from log_conf import logger
+
+from control_table_defs import *
+
+# Instructions
+INST_PING = 0x01
+INST_READ = 0x02
+INST_WRITE = 0x03
+INST_REG_WRITE = 0x04
+INST_ACTION = 0x05
+INST_FACTORY_RESET = 0x06
+INST_REBOOT = 0x08
+INST_STATUS = 0x55
+INST_SYNC_READ = 0x82
+INST_SYNC_WRITE = 0x83
+INST_BULK_READ = 0x92
+INST_BULK_WRITE = 0x93
+
+BROADCAST_ID = 0xFE
+
+# Status packet error bits (Protocol 2 error numbers, Protocol 1 error flags)
+ERR_INSTRUCTION = 0x02
+ERR_DATA_RANGE = 0x04
+ERR_ACCESS = 0x07
+ERR1_INSTRUCTION = 0x40
+
+# Same as the SDK's PortHandler
+LATENCY_TIMER = 16
+
+# Model number : (control table, ID address, return delay address, first RAM address, steps per revolution)
+VIRTUAL_MODELS = {
+    350: (CT_XL320_ADDR, 3, 5, 24, 1024 * 360.0 / 300.0),
+    1200: (CT_XL330_ADDR, 7, 9, 64, 4096),
+    1230: (CT_XC330_ADDR, 7, 9, 64, 4096),
+}
+
+def _make_crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+CRC_TABLE = _make_crc_table()
+
+def crc16(data):
+    """CRC-16 (polynomial 0x8005) as used by Dynamixel Protocol 2."""
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) ^ CRC_TABLE[((crc >> 8) ^ byte) & 0xFF]) & 0xFFFF
+    return crc
+
+def checksum1(data):
+    """Protocol 1 checksum over ID, length, instruction/error and parameters."""
+    return ~sum(data) & 0xFF
+
+class VirtualMotor:
+    """One simulated motor: a control table plus a profile-driven motion model."""
+    def __init__(self, dxl_id, model_number, return_delay=None):
+        if model_number not in VIRTUAL_MODELS:
+            raise RuntimeError(f"No virtual model for motor type {model_number}")
+        self.control_table, addr_id, self.addr_return_delay, self.ram_start, self.steps_per_rev = VIRTUAL_MODELS[model_number]
+        self.model_number = model_number
+        self.is_320 = model_number == 350
+
+        self.addresses = {name: (addr, length) for addr, (name, length) in self.control_table.items()}
+        size = max(addr + length for addr, (_, length) in self.control_table.items())
+        self.table = bytearray(size)
+
+        self._set("Model Number", model_number)
+        self.table[addr_id] = dxl_id
+        self._set("Return Delay Time", 250 if return_delay is None else return_delay)
+
+        center = 512 if self.is_320 else 2048
+        if self.is_320:
+            self._set("CCW Angle Limit", 1023)
+            self._set("Moving Speed", 0)
+        else:
+            self._set("Max Position Limit", 4095)
+            self._set("Moving Threshold", 10)
+            self._set("Present Input Voltage", 50)
+        self._set("Present Position", center)
+        self._set("Goal Position", center)
+        self._set("Present Temperature", 30)
+
+        # Current motion segment
+        self._start_pos = center
+        self._goal_pos = center
+        self._start_time = time.monotonic()
+        self._move_time = 0.0
+        self.registered = None
+
+    @property
+    def dxl_id(self):
+        return self.table[VIRTUAL_MODELS[self.model_number][1]]
+
+    @property
+    def return_delay_s(self):
+        return self.table[self.addr_return_delay] * 2e-6
+
+    def _get(self, name):
+        addr, length = self.addresses[name]
+        return int.from_bytes(self.table[addr:addr + length], "little")
+
+    def _set(self, name, value):
+        addr, length = self.addresses[name]
+        self.table[addr:addr + length] = int(value).to_bytes(length, "little", signed=value < 0)
+
+    def _torque_on(self):
+        return self._get("Torque Enable") != 0
+
+    def _position_at(self, now):
+        if self._move_time <= 0 or now >= self._start_time + self._move_time:
+            return self._goal_pos
+        fraction = (now - self._start_time) / self._move_time
+        return int(round(self._start_pos + (self._goal_pos - self._start_pos) * fraction))
+
+    def _update(self):
+        """Refresh Present Position, Present Velocity and Moving from the motion model."""
+        now = time.monotonic()
+        position = self._position_at(now)
+        moving = self._move_time > 0 and now < self._start_time + self._move_time
+        self._set("Present Position", position)
+        self._set("Moving", 1 if moving else 0)
+        if not self.is_320:
+            velocity = 0
+            if moving:
+                steps_per_s = (self._goal_pos - self._start_pos) / self._move_time
+                velocity = int(steps_per_s * 60.0 / self.steps_per_rev / 0.229)
+            self._set("Present Velocity", velocity & 0xFFFFFFFF)
+
+    def _start_move(self, goal):
+        """Begin a new motion segment from the present position towards goal."""
+        now = time.monotonic()
+        start = self._position_at(now)
+        if self.is_320:
+            goal = min(max(goal, self._get("CW Angle Limit")), self._get("CCW Angle Limit"))
+            speed = self._get("Moving Speed") & 0x3FF
+            # 0 means maximum speed, roughly 114 rpm
+            rpm = speed * 0.111 if speed else 114.0
+            steps_per_s = rpm * self.steps_per_rev / 60.0
+            move_time = abs(goal - start) / steps_per_s
+        else:
+            goal = min(max(goal, self._get("Min Position Limit")), self._get("Max Position Limit"))
+            profile_velocity = self._get("Profile Velocity")
+            if self._get("Drive Mode") & DRIVE_MODE_TIME:
+                # time-based profile: Profile Velocity is the move time in ms
+                move_time = profile_velocity / 1000.0
+            elif profile_velocity == 0:
+                move_time = 0.0
+            else:
+                steps_per_s = profile_velocity * 0.229 * self.steps_per_rev / 60.0
+                move_time = abs(goal - start) / steps_per_s
+        self._start_pos = start
+        self._goal_pos = goal
+        self._start_time = now
+        self._move_time = move_time if goal != start else 0.0
+
+    def read(self, address, length):
+        """Returns (error, data) for a read of length bytes at address."""
+        if address + length > len(self.table):
+            return ERR_DATA_RANGE, b""
+        self._update()
+        return 0, bytes(self.table[address:address + length])
+
+    def write(self, address, data):
+        """Write data at address. Returns the status error (0 on success)."""
+        if address + len(data) > len(self.table):
+            return ERR_DATA_RANGE
+        if address < self.ram_start and self._torque_on():
+            # EEPROM is locked while torque is on
+            return ERR_ACCESS
+
+        self._update()
+        self.table[address:address + len(data)] = data
+
+        goal_addr, goal_len = self.addresses["Goal Position"]
+        if address <= goal_addr < address + len(data):
+            goal = self._get("Goal Position")
+            if not self.is_320 and not self._torque_on() and self._get("Drive Mode") & 0x8:
+                # torque on by goal update
+                self._set("Torque Enable", 1)
+            if self._torque_on():
+                self._start_move(goal)
+        return 0
+
+class VirtualPortHandler:
+    """
+    Drop-in replacement for dynamixel_sdk.PortHandler backed by simulated motors.
+
+    Inputs: port_name -- any name, only used for logging
+            motors -- dictionary mapping motor id to model number (350, 1200 or 1230)
+            protocol -- 1 or 2, the packet format to parse and answer
+            return_delay -- initial Return Delay Time register value (2 us units, factory default 250)
+            usb_latency_ms -- fixed host round trip latency added once per transaction that gets a reply
+            realtime -- if False, replies are available immediately and only the modeled bus time is counted
+    """
+    def __init__(self, port_name, motors, protocol=2, return_delay=None, usb_latency_ms=1.0, realtime=True):
+        self.is_open = False
+        self.baudrate = 1000000
+        self.packet_start_time = 0.0
+        self.packet_timeout = 0.0
+        self.tx_time_per_byte = 0.0
+
+        self.is_using = False
+        self.port_name = port_name
+        self.ser = None
+
+        self.protocol = protocol
+        self.usb_latency_s = usb_latency_ms / 1000.0
+        self.realtime = realtime
+        self.motors = {dxl_id: VirtualMotor(dxl_id, model, return_delay) for dxl_id, model in motors.items()}
+
+        # pending status bytes as (time available, bytes)
+        self._rx_pending = []
+        self._rx_buffer = bytearray()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the packet, byte and modeled bus time counters."""
+        self.stats = {"tx_packets": 0, "rx_packets": 0, "tx_bytes": 0, "rx_bytes": 0, "bus_time_s": 0.0}
+
+    # ------------------------- PortHandler interface -------------------------
+    def openPort(self):
+        return self.setBaudRate(self.baudrate)
+
+    def closePort(self):
+        self.is_open = False
+
+    def clearPort(self):
+        self._rx_pending = []
+        self._rx_buffer = bytearray()
+
+    def setPortName(self, port_name):
+        self.port_name = port_name
+
+    def getPortName(self):
+        return self.port_name
+
+    def setBaudRate(self, baudrate):
+        self.baudrate = baudrate
+        self.tx_time_per_byte = (1000.0 / self.baudrate) * 10.0
+        self.is_open = True
+        return True
+
+    def getBaudRate(self):
+        return self.baudrate
+
+    def getBytesAvailable(self):
+        self._collect()
+        return len(self._rx_buffer)
+
+    def readPort(self, length):
+        self._collect()
+        data = bytes(self._rx_buffer[:length])
+        del self._rx_buffer[:length]
+        return data
+
+    def writePort(self, packet):
+        packet = bytes(packet)
+        self.stats["tx_packets"] += 1
+        self.stats["tx_bytes"] += len(packet)
+
+        now = time.monotonic()
+        ready = now + self._wire_time(len(packet))
+        self.stats["bus_time_s"] += self._wire_time(len(packet))
+
+        replies = self._handle(packet)
+        if replies:
+            # one host round trip per transaction, however many motors answer
+            ready += self.usb_latency_s
+            self.stats["bus_time_s"] += self.usb_latency_s
+        for dxl_id, status in replies:
+            motor = self.motors.get(dxl_id)
+            delay = (motor.return_delay_s if motor else 0.0) + self._wire_time(len(status))
+            ready += delay
+            self.stats["bus_time_s"] += delay
+            self.stats["rx_packets"] += 1
+            self.stats["rx_bytes"] += len(status)
+            self._rx_pending.append((ready if self.realtime else now, status))
+        return len(packet)
+
+    def setPacketTimeout(self, packet_length):
+        self.packet_start_time = self.getCurrentTime()
+        self.packet_timeout = (self.tx_time_per_byte * packet_length) + (LATENCY_TIMER * 2.0) + 2.0
+
+    def setPacketTimeoutMillis(self, msec):
+        self.packet_start_time = self.getCurrentTime()
+        self.packet_timeout = msec
+
+    def isPacketTimeout(self):
+        if self.getTimeSinceStart() > self.packet_timeout:
+            self.packet_timeout = 0
+            return True
+        return False
+
+    def getCurrentTime(self):
+        return round(time.time() * 1000000000) / 1000000.0
+
+    def getTimeSinceStart(self):
+        time_since = self.getCurrentTime() - self.packet_start_time
+        if time_since < 0.0:
+            self.packet_start_time = self.getCurrentTime()
+        return time_since
+
+    # ------------------------------ internals --------------------------------
+    def _wire_time(self, num_bytes):
+        return num_bytes * 10.0 / self.baudrate
+
+    def _collect(self):
+        """Move status bytes whose modeled arrival time has passed into the receive buffer."""
+        if not self._rx_pending:
+            return
+        now = time.monotonic()
+        while self._rx_pending and self._rx_pending[0][0] <= now:
+            self._rx_buffer.extend(self._rx_pending.pop(0)[1])
+
+    def _handle(self, packet):
+        """Parse one instruction packet and return the status packets to send as (id, bytes)."""
+        if self.protocol == 1:
+            parsed = self._parse1(packet)
+        else:
+            parsed = self._parse2(packet)
+        if parsed is None:
+            logger.warning("Virtual bus %s dropped a malformed packet", self.port_name)
+            return []
+
+        dxl_id, instruction, params = parsed
+        replies = []
+        broadcast = dxl_id == BROADCAST_ID
+
+        if instruction == INST_PING:
+            ids = sorted(self.motors) if broadcast else [dxl_id]
+            for i in ids:
+                if i in self.motors:
+                    motor = self.motors[i]
+                    data = motor.model_number.to_bytes(2, "little") + b"\x00" if self.protocol == 2 else b""
+                    replies.append((i, 0, data))
+
+        elif instruction == INST_READ:
+            address, length = self._addr_len(params, 0)
+            if dxl_id in self.motors:
+                error, data = self.motors[dxl_id].read(address, length)
+                replies.append((dxl_id, error, data))
+
+        elif instruction in (INST_WRITE, INST_REG_WRITE):
+            width = 2 if self.protocol == 2 else 1
+            address = int.from_bytes(params[:width], "little")
+            data = params[width:]
+            for i in (sorted(self.motors) if broadcast else [dxl_id]):
+                if i not in self.motors:
+                    continue
+                if instruction == INST_WRITE:
+                    error = self.motors[i].write(address, data)
+                else:
+                    self.motors[i].registered = (address, data)
+                    error = 0
+                if not broadcast:
+                    replies.append((i, error, b""))
+
+        elif instruction == INST_ACTION:
+            for i in (sorted(self.motors) if broadcast else [dxl_id]):
+                motor = self.motors.get(i)
+                if motor is not None and motor.registered is not None:
+                    motor.write(*motor.registered)
+                    motor.registered = None
+
+        elif instruction == INST_SYNC_WRITE:
+            address, length = self._addr_len(params, 0)
+            offset = 4 if self.protocol == 2 else 2
+            while offset + 1 + length <= len(params):
+                i = params[offset]
+                if i in self.motors:
+                    self.motors[i].write(address, params[offset + 1:offset + 1 + length])
+                offset += 1 + length
+
+        elif instruction == INST_SYNC_READ and self.protocol == 2:
+            address, length = self._addr_len(params, 0)
+            for i in params[4:]:
+                if i in self.motors:
+                    error, data = self.motors[i].read(address, length)
+                    replies.append((i, error, data))
+
+        elif instruction == INST_BULK_READ:
+            if self.protocol == 2:
+                entries = [(params[k], int.from_bytes(params[k + 1:k + 3], "little"), int.from_bytes(params[k + 3:k + 5], "little"))
+                           for k in range(0, len(params) - 4, 5)]
+            else:
+                entries = [(params[k + 1], params[k + 2], params[k]) for k in range(1, len(params) - 2, 3)]
+            for i, address, length in entries:
+                if i in self.motors:
+                    error, data = self.motors[i].read(address, length)
+                    replies.append((i, error, data))
+
+        elif instruction == INST_BULK_WRITE and self.protocol == 2:
+            offset = 0
+            while offset + 5 <= len(params):
+                i = params[offset]
+                address = int.from_bytes(params[offset + 1:offset + 3], "little")
+                length = int.from_bytes(params[offset + 3:offset + 5], "little")
+                if i in self.motors:
+                    self.motors[i].write(address, params[offset + 5:offset + 5 + length])
+                offset += 5 + length
+
+        elif instruction in (INST_REBOOT, INST_FACTORY_RESET):
+            if dxl_id in self.motors:
+                replies.append((dxl_id, 0, b""))
+
+        elif not broadcast and dxl_id in self.motors:
+            replies.append((dxl_id, ERR_INSTRUCTION if self.protocol == 2 else ERR1_INSTRUCTION, b""))
+
+        return [(i, self._status(i, error, data)) for i, error, data in replies]
+
+    def _addr_len(self, params, offset):
+        if self.protocol == 2:
+            return int.from_bytes(params[offset:offset + 2], "little"), int.from_bytes(params[offset + 2:offset + 4], "little")
+        return params[offset], params[offset + 1]
+
+    def _parse2(self, packet):
+        """Returns (id, instruction, unstuffed parameters) of a Protocol 2 packet, or None if it is invalid."""
+        if len(packet) < 10 or packet[:4] != b"\xff\xff\xfd\x00":
+            return None
+        length = packet[5] | (packet[6] << 8)
+        if len(packet) != length + 7:
+            return None
+        if crc16(packet[:-2]) != (packet[-2] | (packet[-1] << 8)):
+            return None
+        params = packet[8:-2].replace(b"\xff\xff\xfd\xfd", b"\xff\xff\xfd")
+        return packet[4], packet[7], params
+
+    def _parse1(self, packet):
+        """Returns (id, instruction, parameters) of a Protocol 1 packet, or None if it is invalid."""
+        if len(packet) < 6 or packet[:2] != b"\xff\xff":
+            return None
+        length = packet[3]
+        if len(packet) != length + 4 or checksum1(packet[2:-1]) != packet[-1]:
+            return None
+        return packet[2], packet[4], packet[5:-1]
+
+    def _status(self, dxl_id, error, data):
+        """Build a status packet in the port's protocol."""
+        if self.protocol == 1:
+            body = bytes([dxl_id, len(data) + 2, error]) + data
+            return b"\xff\xff" + body + bytes([checksum1(body)])
+
+        data = data.replace(b"\xff\xff\xfd", b"\xff\xff\xfd\xfd")
+        length = len(data) + 4
+        packet = bytes([0xFF, 0xFF, 0xFD, 0x00, dxl_id, length & 0xFF, length >> 8, INST_STATUS, error]) + data
+        crc = crc16(packet)
+        return packet + bytes([crc & 0xFF, crc >> 8])